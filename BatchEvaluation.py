@@ -0,0 +1,128 @@
+# Date: October 18, 2026
+# Description: Batched evaluation of Xiangqi positions with NumPy. A batch of positions is an (N, 90) int8 array holding
+#              the piece codes of the XiangqiGame board on its 90 playing squares in row-major order, from a1 to i10.
+#              The evaluate_batch function scores every position of a batch at once for material, piece-square bonuses
+#              and a mobility proxy, all from red's point of view, with the same piece values and bonuses as the
+#              XiangqiEngine. The games_to_array function converts XiangqiGame objects into such a batch.
+
+import numpy as np
+
+from XiangqiGame import RED, BLACK, EMPTY, OFFBOARD, TYPE_MASK, GENERAL, ADVISER, ELEPHANT, HORSE, CHARIOT, CANNON, \
+    SOLDIER, SQUARES, ORTHOGONAL, GENERAL_MOVES, ADVISER_MOVES, ELEPHANT_MOVES, HORSE_MOVES, SOLDIER_MOVES
+from XiangqiEngine import PIECE_VALUES, PIECE_SQUARE
+
+# number of piece codes, and the column of each board index in a batch, with two padding columns appended to every
+# position: one holding the sentinel, for moves that do not exist, and one left empty, for moves with nothing to block
+CODES = 32
+COLUMNS = {index: column for column, index in enumerate(SQUARES)}
+PAD_OFFBOARD = len(SQUARES)
+PAD_EMPTY = len(SQUARES) + 1
+
+# most moves a piece has in the mobility proxy, which is a horse's eight
+MAX_MOVES = 8
+
+# material of every piece code, positive for red and negative for black
+MATERIAL = np.zeros(CODES, dtype=np.int32)
+for _piece_type, _value in PIECE_VALUES.items():
+    MATERIAL[RED | _piece_type] = _value
+    MATERIAL[BLACK | _piece_type] = -_value
+
+# positional bonus of every piece code on every column, the engine's piece-square score without the material
+BONUS = np.zeros((CODES, len(SQUARES)), dtype=np.int32)
+for _code in range(CODES):
+    if MATERIAL[_code]:
+        BONUS[_code] = [PIECE_SQUARE[_code][index] - MATERIAL[_code] for index in SQUARES]
+
+
+def _moves(code, index):
+    """
+    Returns the (to, block) pairs of board indexes counted by the mobility proxy for a piece of the given code on the
+    given board index, where block is the square that must be empty for the move, or None if nothing can block it.
+    Chariots and cannons are counted one step along each line
+    """
+    piece_type = code & TYPE_MASK
+    if piece_type == GENERAL:
+        return [(to, None) for to in GENERAL_MOVES[index]]
+    if piece_type == ADVISER:
+        return [(to, None) for to in ADVISER_MOVES[index]]
+    if piece_type == ELEPHANT:
+        return list(ELEPHANT_MOVES[index].items())
+    if piece_type == HORSE:
+        return list(HORSE_MOVES[index].items())
+    if piece_type == SOLDIER:
+        return [(to, None) for to in SOLDIER_MOVES[code & (RED | BLACK)][index]]
+    if piece_type in (CHARIOT, CANNON):
+        return [(index + step, None) for step in ORTHOGONAL if index + step in COLUMNS]
+    return []
+
+
+# columns of the squares counted by the mobility proxy for every piece code on every column, and of the squares that
+# must be empty for each of them, padded to the same number of moves
+TARGETS = np.full((CODES, len(SQUARES), MAX_MOVES), PAD_OFFBOARD, dtype=np.intp)
+BLOCKS = np.full((CODES, len(SQUARES), MAX_MOVES), PAD_EMPTY, dtype=np.intp)
+for _code in range(CODES):
+    if MATERIAL[_code]:
+        for _column, _index in enumerate(SQUARES):
+            for _move, (_to, _block) in enumerate(_moves(_code, _index)):
+                TARGETS[_code, _column, _move] = COLUMNS[_to]
+                if _block is not None:
+                    BLOCKS[_code, _column, _move] = COLUMNS[_block]
+del _piece_type, _value, _code, _column, _index, _move, _to, _block
+
+# sign of the score of every piece code, positive for red and negative for black
+SIGN = np.sign(MATERIAL).astype(np.int32)
+
+
+def games_to_array(games):
+    """
+    Returns an (N, 90) int8 array of the piece codes on the playing squares of the boards of the given XiangqiGame
+    objects, gathering the squares of every board at once
+    """
+    boards = [game.board() for game in games]
+    if not boards:
+        return np.zeros((0, len(SQUARES)), dtype=np.int8)
+    mailboxes = np.frombuffer(b"".join(boards), dtype=np.uint8).reshape(len(boards), -1)
+    return mailboxes[:, SQUARES].astype(np.int8)
+
+
+def evaluate_batch(positions, chunk_size=65536):
+    """
+    Returns a dictionary of the "material", "pst" and "mobility" scores of every position of the given (N, 90) array of
+    piece codes as int32 arrays of length N, from red's point of view. The sum of the material and piece-square scores
+    is the score the XiangqiEngine evaluates the position to. The mobility proxy counts the squares each piece could
+    step to that are not held by its own player, ignoring check, and subtracts black's count from red's. Positions are
+    scored chunk_size at a time to bound the memory used for the mobility proxy
+    """
+    positions = np.asarray(positions)
+    if positions.ndim != 2 or positions.shape[1] != len(SQUARES):
+        raise ValueError("expected an (N, 90) array of piece codes")
+
+    count = positions.shape[0]
+    scores = {name: np.zeros(count, dtype=np.int32) for name in ("material", "pst", "mobility")}
+    columns = np.arange(len(SQUARES))
+    for start in range(0, count, chunk_size):
+        codes = positions[start:start + chunk_size].astype(np.intp)
+        scores["material"][start:start + len(codes)] = MATERIAL[codes].sum(axis=1)
+        scores["pst"][start:start + len(codes)] = BONUS[codes, columns].sum(axis=1)
+        scores["mobility"][start:start + len(codes)] = _mobility(codes)
+    return scores
+
+
+def _mobility(codes):
+    """Returns the mobility proxy of every position of the given (N, 90) array of piece codes"""
+    count = codes.shape[0]
+
+    # append the sentinel and empty padding columns, and pick out the pieces, about a third of the squares
+    padded = np.concatenate([codes.astype(np.uint8), np.full((count, 1), OFFBOARD, dtype=np.uint8),
+                             np.full((count, 1), EMPTY, dtype=np.uint8)], axis=1)
+    rows, columns = np.nonzero(codes)
+    pieces = codes[rows, columns]
+
+    # look up the codes on the target and blocking squares of every move of every piece
+    targets = padded[rows[:, np.newaxis], TARGETS[pieces, columns]]
+    blocks = padded[rows[:, np.newaxis], BLOCKS[pieces, columns]]
+
+    # a move counts if it exists, is not blocked, and does not land on a piece of the same player
+    players = (pieces & (RED | BLACK)).astype(np.uint8)[:, np.newaxis]
+    open_moves = (targets != OFFBOARD) & (blocks == EMPTY) & ((targets & players) == 0)
+    return np.bincount(rows, weights=open_moves.sum(axis=1) * SIGN[pieces], minlength=count).astype(np.int32)
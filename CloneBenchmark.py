@@ -0,0 +1,59 @@
+# Date: October 18, 2026
+# Description: Copy benchmark for the XiangqiGame program. Plays a number of random moves into a game and then times
+#              copying it with copy.deepcopy, with XiangqiGame.clone, with XiangqiGame.snapshot alone, and with a
+#              snapshot turned back into a game with XiangqiGame.from_snapshot, reporting the microseconds per copy of
+#              each and the speedup of clone over deepcopy.
+
+import argparse
+import copy
+import random
+import time
+
+from XiangqiGame import XiangqiGame
+
+
+def time_copies(function, game, count):
+    """Returns the microseconds per call of the given function on the given game, over the given number of calls"""
+    start = time.perf_counter()
+    for number in range(count):
+        function(game)
+    return 1e6 * (time.perf_counter() - start) / count
+
+
+def measure_copies(moves=40, count=2000, seed=0):
+    """
+    Returns a dictionary of the microseconds per copy of a game after the given number of random moves with "deepcopy",
+    "clone", "snapshot" and "from_snapshot", each timed over the given number of copies
+    """
+    rng = random.Random(seed)
+    game = XiangqiGame()
+    for ply in range(moves):
+        legal = game.legal_moves()
+        if not legal:
+            break
+        game.make_move(*rng.choice(legal))
+
+    snapshot = game.snapshot()
+    return {"deepcopy": time_copies(copy.deepcopy, game, max(1, count // 10)),
+            "clone": time_copies(XiangqiGame.clone, game, count),
+            "snapshot": time_copies(XiangqiGame.snapshot, game, count),
+            "from_snapshot": time_copies(lambda copied: XiangqiGame.from_snapshot(snapshot), game, count)}
+
+
+def main(arguments=None):
+    """Runs the copy benchmark command line interface with the given arguments, or the ones given to the program"""
+    parser = argparse.ArgumentParser(description="Times copying a Xiangqi game with deepcopy, clone and snapshot.")
+    parser.add_argument("--moves", type=int, default=40, help="random moves to play before copying (default 40)")
+    parser.add_argument("--count", type=int, default=2000, help="copies to time (default 2000)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random moves (default 0)")
+    args = parser.parse_args(arguments)
+
+    result = measure_copies(args.moves, args.count, args.seed)
+    for name, microseconds in result.items():
+        print(name + ":", round(microseconds, 1), "us")
+    print("clone speedup over deepcopy:", round(result["deepcopy"] / result["clone"], 1))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
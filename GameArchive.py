@@ -0,0 +1,285 @@
+# Date: October 18, 2026
+# Description: Streaming reader and validator of recorded Xiangqi games for the XiangqiGame program. An archive holds
+#              records in the PGN layout used for Xiangqi: tag lines such as [ID "1"] and [FEN "..."] followed by the
+#              moves, in ICCS coordinates (h2e2) or WXF notation (C2=5). The GameArchive class reads a file or file
+#              object a line at a time, converts every move to the algebraically-notated locations make_move takes,
+#              checks it is legal, and replays it without printing anything, yielding (game id, game, move) tuples
+#              lazily so memory stays flat however large the archive is.
+
+import argparse
+import re
+import time
+
+from XiangqiGame import XiangqiGame, Rules, COLOR, RED, GENERAL, ADVISER, ELEPHANT, HORSE, CHARIOT, CANNON, \
+    SOLDIER, ROW, COLUMN, parse_square, square, square_name
+
+# piece letters of WXF notation, with the alternative letters for elephants and horses
+WXF_PIECES = {"K": GENERAL, "A": ADVISER, "E": ELEPHANT, "B": ELEPHANT, "H": HORSE, "N": HORSE, "R": CHARIOT,
+              "C": CANNON, "P": SOLDIER}
+
+# tokens of the move text that are not moves, and the move number a move may be written together with
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+MOVE_NUMBER = re.compile(r"^[0-9]+\.+")
+
+
+class ArchiveError(ValueError):
+    """Raised for a record that cannot be read or holds an illegal move"""
+    pass
+
+
+def iccs_to_move(token):
+    """
+    Returns the (from, to) algebraically-notated locations of the given ICCS move, such as h2e2 or H2-E2, whose ranks
+    count from 0 on red's side, or None if the token is not an ICCS move
+    """
+    text = token.replace("-", "").lower()
+    if len(text) != 4 or text[0] not in "abcdefghi" or text[2] not in "abcdefghi" or not text[1].isdigit() \
+            or not text[3].isdigit():
+        return None
+    return text[0] + str(int(text[1]) + 1), text[2] + str(int(text[3]) + 1)
+
+
+def wxf_to_move(game, token):
+    """
+    Returns the (from, to) algebraically-notated locations of the given WXF move, such as C2=5, H8+7 or C+.5, for the
+    player with turn in the given game. Raises ArchiveError if the move does not name exactly one legal move
+    """
+    text = token.upper()
+    if len(text) != 4:
+        raise ArchiveError("unreadable move: " + token)
+
+    # the piece letter comes before or after the file, or the front or rear marker of two pieces on the same file
+    if text[0] in "+-":
+        letter, file, operator, number = text[1], text[0], text[2], text[3]
+    else:
+        letter, file, operator, number = text[0], text[1], text[2], text[3]
+    if letter not in WXF_PIECES or operator not in "+-=." or not number.isdigit() or number == "0":
+        raise ArchiveError("unreadable move: " + token)
+
+    board = game.board()
+    player = COLOR[game.get_turn()]
+    code = WXF_PIECES[letter] | player
+    forward = 1 if player == RED else -1
+
+    # find the pieces the move can be made by, on the given file or at the front or rear of a file holding two
+    if file.isdigit():
+        column = _file_column(int(file), player)
+        sources = [square(row, column) for row in range(1, 11) if board[square(row, column)] == code]
+    elif file in "+-":
+        sources = []
+        for column in range(1, 10):
+            on_file = sorted((square(row, column) for row in range(1, 11) if board[square(row, column)] == code),
+                             key=lambda index: index * forward)
+            if len(on_file) == 2:
+                sources.append(on_file[1] if file == "+" else on_file[0])
+    else:
+        raise ArchiveError("unreadable move: " + token)
+
+    # work out the destination from each piece, and keep those that are legal moves
+    moves = []
+    for square_from in sources:
+        square_to = _wxf_destination(square_from, WXF_PIECES[letter], player, operator, int(number))
+        if square_to is not None and Rules.is_legal_move(board, player, game.get_game_state(), square_from, square_to,
+                                                         game.is_in_check(game.get_turn())) is True:
+            moves.append((square_name(square_from), square_name(square_to)))
+    if len(moves) != 1:
+        raise ArchiveError(("ambiguous" if moves else "illegal") + " move: " + token)
+    return moves[0]
+
+
+def _file_column(file, player):
+    """Returns the column of the given WXF file, which counts from the right of the given player"""
+    return 10 - file if player == RED else file
+
+
+def _wxf_destination(square_from, piece_type, player, operator, number):
+    """Returns the board index a WXF move takes the piece of the given type from the given board index to, if any"""
+    row = ROW[square_from]
+    column = COLUMN[square_from]
+    if operator in "=.":
+        to_row, to_column = row, _file_column(number, player)
+    else:
+        direction = 1 if (operator == "+") == (player == RED) else -1
+
+        # pieces moving along lines go forward or backward by the number of rows, and the others to the given file
+        if piece_type in (GENERAL, CHARIOT, CANNON, SOLDIER):
+            to_row, to_column = row + direction * number, column
+        else:
+            to_column = _file_column(number, player)
+            if piece_type == ADVISER:
+                steps = 1
+            elif piece_type == ELEPHANT:
+                steps = 2
+            else:
+                steps = 2 if abs(to_column - column) == 1 else 1
+            to_row = row + direction * steps
+    if to_row < 1 or to_row > 10:
+        return None
+    return square(to_row, to_column)
+
+
+class GameArchive:
+    """
+    Represents a streaming reader of an archive of recorded games with data members for the file or path it reads,
+    whether a bad record raises an error or is skipped, the tags of the record being read, and the number of records,
+    valid records and moves read so far, and the errors of the records skipped
+    """
+    def __init__(self, source, strict=False):
+        """
+        Returns a reader of the given path or file object. If strict, the first bad record raises ArchiveError,
+        and otherwise it is skipped and its error kept
+        """
+        self._source = source
+        self._strict = strict
+        self._records = 0
+        self._valid = 0
+        self._moves = 0
+        self._errors = []
+        self._tags = {}
+
+    def get_records(self):
+        """Returns the number of records read so far"""
+        return self._records
+
+    def get_valid(self):
+        """Returns the number of records read so far whose every move was legal"""
+        return self._valid
+
+    def get_moves(self):
+        """Returns the number of moves replayed so far"""
+        return self._moves
+
+    def get_tags(self):
+        """Returns a dictionary of the tags of the record being read, such as its Result"""
+        return self._tags
+
+    def get_errors(self):
+        """Returns a list of (game id, message) pairs of the records skipped so far"""
+        return self._errors
+
+    def __iter__(self):
+        """
+        Yields a (game id, game, move) tuple for every move of every record, where game is in the position before the
+        move and move is its (from, to) algebraically-notated locations. The game is reused as the moves are replayed,
+        so anything needed from it, such as its to_fen() or get_key(), has to be taken before the next tuple
+        """
+        if isinstance(self._source, str):
+            with open(self._source) as lines:
+                yield from self._replay(lines)
+        else:
+            yield from self._replay(self._source)
+
+    def _replay(self, lines):
+        """Yields the moves of every record read from the given lines"""
+        for game_id, tags, tokens in self._read(lines):
+            self._records += 1
+            self._tags = tags
+            number = 0
+            try:
+                game = XiangqiGame.from_fen(tags["FEN"]) if "FEN" in tags else XiangqiGame()
+                for number, token in enumerate(tokens, 1):
+                    move = self._convert(game, token)
+                    yield game_id, game, move
+                    game.push_move(parse_square(move[0]), parse_square(move[1]))
+                    self._moves += 1
+
+                # look for the end of the game only once the record is over
+                game.check_or_stale()
+                self._valid += 1
+            except ArchiveError as error:
+                message = "move " + str(number) + ": " + str(error) if number else str(error)
+                if self._strict:
+                    raise ArchiveError("game " + str(game_id) + ", " + message)
+                self._errors.append((game_id, message))
+            except ValueError as error:
+                if self._strict:
+                    raise ArchiveError("game " + str(game_id) + ": " + str(error))
+                self._errors.append((game_id, str(error)))
+
+    @staticmethod
+    def _convert(game, token):
+        """Returns the (from, to) locations of the given ICCS or WXF move, raising ArchiveError if it is not legal"""
+        move = iccs_to_move(token)
+        if move is None:
+            return wxf_to_move(game, token)
+
+        square_from = parse_square(move[0])
+        square_to = parse_square(move[1])
+        if Rules.is_legal_move(game.board(), COLOR[game.get_turn()], game.get_game_state(), square_from, square_to,
+                               game.is_in_check(game.get_turn())) is not True:
+            raise ArchiveError("illegal move: " + token)
+        return move
+
+    def _read(self, lines):
+        """
+        Yields a (game id, tags, move tokens) tuple for every record of the given lines, where the game id is the value
+        of the ID tag, or the number of the record if it has none
+        """
+        tags = {}
+        tokens = []
+        in_text = False
+        in_comment = False
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            # a tag line after move text starts the next record
+            if line.startswith("[") and not in_comment:
+                if in_text:
+                    yield tags.get("ID", str(self._records + 1)), tags, tokens
+                    tags = {}
+                    tokens = []
+                    in_text = False
+                name, _, value = line[1:].rstrip("]").partition(" ")
+                tags[name] = value.strip().strip('"')
+                continue
+            in_text = True
+
+            # keep the moves of the line, dropping comments, move numbers and results
+            for word in line.replace("{", " { ").replace("}", " } ").split():
+                if in_comment:
+                    in_comment = word != "}"
+                elif word == "{":
+                    in_comment = True
+                elif word.startswith(";"):
+                    break
+                elif word not in RESULTS:
+                    word = MOVE_NUMBER.sub("", word)
+                    if word:
+                        tokens.append(word)
+
+        if in_text or tags:
+            yield tags.get("ID", str(self._records + 1)), tags, tokens
+
+
+def main(arguments=None):
+    """Runs the archive validator command line interface with the given arguments, or the ones given to the program"""
+    parser = argparse.ArgumentParser(description="Validates archives of recorded Xiangqi games.")
+    parser.add_argument("archives", nargs="+", help="archive files to read")
+    parser.add_argument("--strict", action="store_true", help="stop at the first bad record")
+    args = parser.parse_args(arguments)
+
+    failed = False
+    for path in args.archives:
+        archive = GameArchive(path, args.strict)
+        start = time.perf_counter()
+        try:
+            for game_id, game, move in archive:
+                pass
+        except ArchiveError as error:
+            print(path + ":", error)
+            failed = True
+        elapsed = time.perf_counter() - start
+
+        for game_id, message in archive.get_errors():
+            print(path + ": game " + str(game_id) + ", " + message)
+        rate = str(int(archive.get_moves() / elapsed)) if elapsed > 0 else "-"
+        print(path + ":", archive.get_records(), "records,", archive.get_valid(), "valid,", archive.get_moves(),
+              "moves (" + rate + " moves/s)")
+        failed = failed or bool(archive.get_errors())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
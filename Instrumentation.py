@@ -0,0 +1,192 @@
+# Date: October 18, 2026
+# Description: Opt-in instrumentation of the hot paths of the XiangqiGame program. When enabled, the rule checks of
+#              Piece.checker and every piece type's is_legal_move, the check scans check_put_in_check and
+#              check_or_stale, the Rules kernel's generate_moves, is_safe_move, is_square_attacked and gives_check,
+#              and make_move itself are swapped for wrappers that count their calls and add up the nanoseconds spent
+#              in them. Disabling puts the original functions back, so the instrumentation costs
+#              nothing at all while it is off. The get_stats function returns a snapshot of the counters with averages
+#              per move made, and the profile_moves context manager runs cProfile around a block of moves.
+
+import argparse
+import cProfile
+import contextlib
+import inspect
+import pstats
+import random
+import sys
+import time
+
+from XiangqiGame import XiangqiGame, Piece, Rules, PIECE_TYPES
+
+# (class, attribute) of every function instrumented, with make_move first as it counts the moves the averages are per
+TARGETS = ((XiangqiGame, "make_move"), (Piece, "checker")) + tuple((piece_type, "is_legal_move")
+                                                                    for piece_type in PIECE_TYPES[1:]) \
+    + ((XiangqiGame, "check_put_in_check"), (XiangqiGame, "check_or_stale"), (Rules, "generate_moves"),
+       (Rules, "is_safe_move"), (Rules, "is_square_attacked"), (Rules, "gives_check"))
+
+# [calls, nanoseconds] of every instrumented function by name, and the original class attributes while enabled
+_counters = {cls.__name__ + "." + name: [0, 0] for cls, name in TARGETS}
+_originals = {}
+
+
+def _wrap(function, counter):
+    """
+    Returns a wrapper of the given function adding one call and its nanoseconds to the given counter. The wrapper of a
+    generator function counts the nanoseconds spent producing each item, but not the time its caller holds it
+    """
+    clock = time.perf_counter_ns
+
+    def generator_wrapper(*args, **kwargs):
+        """Yields the items of the wrapped generator function, counting the call and the nanoseconds it took"""
+        counter[0] += 1
+        start = clock()
+        iterator = function(*args, **kwargs)
+        counter[1] += clock() - start
+        while True:
+            start = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                counter[1] += clock() - start
+            yield item
+
+    def call_wrapper(*args, **kwargs):
+        """Calls the wrapped function, counting the call and the nanoseconds it took"""
+        start = clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            counter[0] += 1
+            counter[1] += clock() - start
+
+    wrapper = generator_wrapper if inspect.isgeneratorfunction(function) else call_wrapper
+    wrapper.__wrapped__ = function
+    wrapper.__doc__ = function.__doc__
+    return wrapper
+
+
+def enable():
+    """Swaps every instrumented function for its counting wrapper, if the instrumentation is not already enabled"""
+    if _originals:
+        return
+    for cls, name in TARGETS:
+        original = cls.__dict__[name]
+        counter = _counters[cls.__name__ + "." + name]
+
+        # static methods are wrapped as the plain function they hold and set back up as static methods
+        if isinstance(original, staticmethod):
+            setattr(cls, name, staticmethod(_wrap(original.__func__, counter)))
+        else:
+            setattr(cls, name, _wrap(original, counter))
+        _originals[cls, name] = original
+
+
+def disable():
+    """Puts every instrumented function back, so the instrumentation costs nothing, keeping the counters"""
+    for (cls, name), original in _originals.items():
+        setattr(cls, name, original)
+    _originals.clear()
+
+
+def is_enabled():
+    """Returns True if the instrumentation is enabled"""
+    return bool(_originals)
+
+
+def reset():
+    """Sets every counter back to zero"""
+    for counter in _counters.values():
+        counter[0] = 0
+        counter[1] = 0
+
+
+def get_stats():
+    """
+    Returns a snapshot of the counters as a dictionary by function name, such as "Piece.checker", of dictionaries of
+    the "calls", the cumulative "ns" including the functions it calls, the "ns_per_call", and the "calls_per_move" and
+    "ns_per_move" averaged over the calls of make_move, which are None until a move is made
+    """
+    moves = _counters["XiangqiGame.make_move"][0]
+    stats = {}
+    for name, (calls, ns) in _counters.items():
+        stats[name] = {"calls": calls, "ns": ns, "ns_per_call": ns / calls if calls else None,
+                       "calls_per_move": calls / moves if moves else None, "ns_per_move": ns / moves if moves else None}
+    return stats
+
+
+@contextlib.contextmanager
+def instrumented(clear=True):
+    """
+    Enables the instrumentation for the block of a with statement, first setting the counters back to zero if clear is
+    True, and disables it again afterwards unless it was already enabled
+    """
+    was_enabled = is_enabled()
+    if clear:
+        reset()
+    enable()
+    try:
+        yield
+    finally:
+        if not was_enabled:
+            disable()
+
+
+@contextlib.contextmanager
+def profile_moves(output=None, sort="cumulative", limit=25):
+    """
+    Runs cProfile around the block of a with statement and yields the cProfile.Profile. If an output stream is given,
+    the given number of functions with the most time by the given sort key are written to it at the end of the block
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if output is not None:
+            pstats.Stats(profiler, stream=output).sort_stats(sort).print_stats(limit)
+
+
+def play_random_games(games, max_moves=200, seed=0):
+    """Plays the given number of games of random legal moves through make_move, and returns the moves made"""
+    rng = random.Random(seed)
+    moves = 0
+    for number in range(games):
+        game = XiangqiGame()
+        for ply in range(max_moves):
+            legal = game.legal_moves()
+            if not legal:
+                break
+            game.make_move(*rng.choice(legal))
+            moves += 1
+    return moves
+
+
+def main(arguments=None):
+    """Runs the instrumentation command line interface with the given arguments, or the ones given to the program"""
+    parser = argparse.ArgumentParser(description="Counts and times the rule checks of random Xiangqi games.")
+    parser.add_argument("--games", type=int, default=10, help="number of random games to play (default 10)")
+    parser.add_argument("--moves", type=int, default=200, help="most moves of every game (default 200)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random moves (default 0)")
+    parser.add_argument("--profile", action="store_true", help="run cProfile around the games instead")
+    args = parser.parse_args(arguments)
+
+    if args.profile:
+        with profile_moves(sys.stdout):
+            play_random_games(args.games, args.moves, args.seed)
+        return 0
+
+    with instrumented():
+        play_random_games(args.games, args.moves, args.seed)
+    for name, stats in get_stats().items():
+        ns_per_call = "-" if stats["ns_per_call"] is None else str(round(stats["ns_per_call"]))
+        calls_per_move = "-" if stats["calls_per_move"] is None else str(round(stats["calls_per_move"], 2))
+        print(name.ljust(30), str(stats["calls"]).rjust(10), "calls", str(int(stats["ns"] / 1000)).rjust(10), "us",
+              ns_per_call.rjust(8), "ns/call", calls_per_move.rjust(8), "calls/move")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
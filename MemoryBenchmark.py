@@ -0,0 +1,104 @@
+# Date: October 18, 2026
+# Description: Memory benchmark for the XiangqiGame program. Creates a number of live games, optionally playing some
+#              random moves in each so captured pieces and move history are included, and measures the memory they
+#              hold with tracemalloc. Reports the bytes per live game and the bytes per piece object, to track the cost
+#              of hosting many thousands of concurrent games in one process. With the baseline switch, the pieces of
+#              every game are swapped for ones keeping their data members in an attribute dictionary and their own
+#              location tuples, as pieces did before they were slotted, to measure the saving the slots make.
+
+import argparse
+import random
+import sys
+import tracemalloc
+
+from XiangqiGame import XiangqiGame, Piece
+
+
+class DictPiece:
+    """
+    Represents a piece of the baseline model, with data members for its type, location, player and slot index kept in an
+    attribute dictionary, and the accessors of Piece
+    """
+    get_code = Piece.get_code
+    get_piece_type = Piece.get_piece_type
+    get_location = Piece.get_location
+    set_location = Piece.set_location
+    get_player = Piece.get_player
+
+    def __init__(self, piece_type, location, player):
+        """Returns a piece of the given type, location and player"""
+        self._piece_type = piece_type
+        self._location = location
+        self._player = player
+        self._index = None
+
+    def __repr__(self):
+        """Sets up repr strings for pieces to be placed on to the game board"""
+        return self._player[0] + self._piece_type.letter
+
+
+def baseline_game():
+    """
+    Returns a game in the starting position with its pieces swapped for DictPiece objects, each with a location tuple of
+    its own, placed in the order of the lists of pieces on the board
+    """
+    game = XiangqiGame()
+    pieces = game._red_on_board + game._black_on_board
+    del game._red_on_board[:], game._black_on_board[:]
+    for piece in pieces:
+        row, column = piece.get_location()
+        game._place(DictPiece(piece.get_piece_type(), (row, column), piece.get_player()))
+    return game
+
+
+def measure_games(count, moves=0, seed=0, baseline=False):
+    """
+    Returns a dictionary of the "games" created, the "bytes" they hold in total and per game, and the "piece_bytes" a
+    single piece object holds, which is None if no games are created. Each game is created from the starting position,
+    with DictPiece objects if baseline is True, and then plays the given number of random legal moves
+    """
+    rng = random.Random(seed)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = []
+    for number in range(count):
+        game = baseline_game() if baseline else XiangqiGame()
+        for ply in range(moves):
+            legal = game.legal_moves()
+            if not legal:
+                break
+            game.make_move(*rng.choice(legal))
+        games.append(game)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    if not games:
+        return {"games": 0, "bytes": held, "bytes_per_game": 0, "piece_bytes": None}
+
+    # size of a piece object, including its attribute dictionary if it has one
+    piece = games[0]._red_on_board[0]
+    piece_bytes = sys.getsizeof(piece)
+    if hasattr(piece, "__dict__"):
+        piece_bytes += sys.getsizeof(piece.__dict__)
+    return {"games": count, "bytes": held, "bytes_per_game": held // count, "piece_bytes": piece_bytes}
+
+
+def main(arguments=None):
+    """Runs the memory benchmark command line interface with the given arguments, or the ones given to the program"""
+    parser = argparse.ArgumentParser(description="Measures the memory held by live Xiangqi games.")
+    parser.add_argument("games", type=int, nargs="?", default=10000, help="number of live games (default 10000)")
+    parser.add_argument("--moves", type=int, default=0, help="random moves to play in each game (default 0)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random moves (default 0)")
+    parser.add_argument("--baseline", action="store_true",
+                        help="measure games of pieces with attribute dictionaries, as before pieces were slotted")
+    args = parser.parse_args(arguments)
+
+    result = measure_games(args.games, args.moves, args.seed, args.baseline)
+    print("games:", result["games"], "moves each:", args.moves)
+    print("bytes:", result["bytes"], "bytes/game:", result["bytes_per_game"])
+    print("bytes/piece:", result["piece_bytes"])
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,164 @@
+# Date: October 18, 2026
+# Description: Opening book for the XiangqiGame program. The build_book function collects the moves played in the
+#              opening of recorded games into a file of fixed-size records of (position key, move, weight, count),
+#              sorted by the Zobrist key of the position, where the weight is the points the move scored for its
+#              player. The OpeningBook class memory-maps such a file and finds the book moves of a position by binary
+#              search over the records, without parsing anything when it is opened, so any number of processes can
+#              share it.
+
+import argparse
+import mmap
+import random
+import struct
+
+from XiangqiGame import XiangqiGame, Rules, COLOR, parse_move, parse_square, square_name
+from GameArchive import GameArchive
+
+# file header, followed by records of a 64-bit key, the from and to board indexes of the move, its weight and count
+MAGIC = b"XQBOOK1\x00"
+RECORD = struct.Struct("<QBBHI")
+KEY = struct.Struct("<Q")
+MAX_WEIGHT = 65535
+
+# points a move scores for its player from the result of the game: two for a win, one for a draw and none for a loss
+RESULT_POINTS = {"1-0": {"red": 2, "black": 0}, "0-1": {"red": 0, "black": 2}, "1/2-1/2": {"red": 1, "black": 1}}
+
+
+def build_book(archives, path, max_plies=20):
+    """
+    Writes an opening book to the given path from the moves of the first max_plies plies of every game of the given
+    GameArchive objects, weighting each move by the result tag of its game. Returns the number of records written
+    """
+    entries = {}
+    for archive in archives:
+        last_game = None
+        ply = 0
+        for game_id, game, move in archive:
+
+            # the archive replays every record on a new game object
+            if game is not last_game:
+                last_game = game
+                ply = 0
+            ply += 1
+            if ply > max_plies:
+                continue
+
+            entry = entries.setdefault((game.get_key(), parse_square(move[0]), parse_square(move[1])), [0, 0])
+            entry[0] += 1
+            entry[1] += RESULT_POINTS.get(archive.get_tags().get("Result"), {}).get(game.get_turn(), 0)
+
+    # write the records sorted by key, so a position's moves are next to each other and can be found by binary search
+    with open(path, "wb") as book:
+        book.write(MAGIC)
+        for (key, square_from, square_to), (count, points) in sorted(entries.items()):
+            book.write(RECORD.pack(key, square_from, square_to, min(points, MAX_WEIGHT), count))
+    return len(entries)
+
+
+class OpeningBook:
+    """
+    Represents an opening book file mapped into memory, with data members for the file, the memory map and the number
+    of records
+    """
+    def __init__(self, path):
+        """Returns the opening book at the given path"""
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC or (len(self._map) - len(MAGIC)) % RECORD.size != 0:
+            self.close()
+            raise ValueError("not an opening book: " + path)
+        self._count = (len(self._map) - len(MAGIC)) // RECORD.size
+
+    def __enter__(self):
+        """Returns the book itself for use in a with statement"""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Unmaps and closes the file at the end of a with statement"""
+        self.close()
+
+    def __len__(self):
+        """Returns the number of records in the book"""
+        return self._count
+
+    def close(self):
+        """Unmaps and closes the file"""
+        self._map.close()
+        self._file.close()
+
+    def get_moves(self, game):
+        """
+        Returns a list of the (from, to, weight, count) book moves of the position of the given game, with the from and
+        to locations algebraically-notated, leaving out any move that is not legal in the position
+        """
+        key = game.get_key()
+        board = game.board()
+        player = COLOR[game.get_turn()]
+        in_check = game.is_in_check(game.get_turn())
+
+        # find the first record of the key by binary search, then read records until the key changes
+        low = 0
+        high = self._count
+        while low < high:
+            middle = (low + high) // 2
+            if KEY.unpack_from(self._map, len(MAGIC) + middle * RECORD.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        moves = []
+        for index in range(low, self._count):
+            record_key, square_from, square_to, weight, count = RECORD.unpack_from(self._map,
+                                                                                   len(MAGIC) + index * RECORD.size)
+            if record_key != key:
+                break
+            if Rules.is_legal_move(board, player, game.get_game_state(), square_from, square_to, in_check) is True:
+                moves.append((square_name(square_from), square_name(square_to), weight, count))
+        return moves
+
+    def choose_move(self, game, rng=random):
+        """
+        Returns the (from, to) algebraically-notated locations of a book move of the position of the given game, picked
+        at random in proportion to its weight, or to its count if no move has any weight, or None if there is none
+        """
+        moves = self.get_moves(game)
+        if not moves:
+            return None
+        weights = [weight for from_square, to_square, weight, count in moves]
+        if not any(weights):
+            weights = [count for from_square, to_square, weight, count in moves]
+        from_square, to_square, weight, count = rng.choices(moves, weights)[0]
+        return from_square, to_square
+
+
+def main(arguments=None):
+    """Runs the opening book command line interface with the given arguments, or the ones given to the program"""
+    parser = argparse.ArgumentParser(description="Builds and probes Xiangqi opening books.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a book from archives of recorded games")
+    build.add_argument("book", help="book file to write")
+    build.add_argument("archives", nargs="+", help="archive files to read")
+    build.add_argument("--plies", type=int, default=20, help="plies of every game to take (default 20)")
+    probe = commands.add_parser("probe", help="print the book moves of a position")
+    probe.add_argument("book", help="book file to read")
+    probe.add_argument("moves", nargs="*", help="moves to play from the starting position first, such as h3e3")
+    args = parser.parse_args(arguments)
+
+    if args.command == "build":
+        count = build_book([GameArchive(path) for path in args.archives], args.book, args.plies)
+        print(args.book + ":", count, "records")
+        return 0
+
+    game = XiangqiGame()
+    for move in args.moves:
+        squares = parse_move(move)
+        if squares is None or not game.make_move(*squares):
+            print("illegal move:", move)
+            return 1
+    with OpeningBook(args.book) as book:
+        for from_square, to_square, weight, count in book.get_moves(game):
+            print(from_square + to_square, "weight", weight, "count", count)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,204 @@
+# Date: October 18, 2026
+# Description: Multi-core search for the XiangqiGame program. The ParallelSearch class splits the root moves of a
+#              position over a pool of worker processes, each running a XiangqiEngine with its own transposition table.
+#              At every depth of the iterative deepening the first root move is searched alone for a bound, and the
+#              remaining root moves are then searched against that bound at the same time. Positions are sent to the
+#              workers as 91 bytes, and the speedup of any number of workers over a single worker can be measured.
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from XiangqiGame import XiangqiGame, Rules, COLOR, SQUARES, parse_move
+from XiangqiEngine import XiangqiEngine, SearchResult, INFINITY, MATE, MAX_PLY
+from TranspositionTable import TranspositionTable
+
+# transposition table of a worker process, kept from one search task to the next
+_worker_table = None
+
+
+def encode_position(game):
+    """Returns the position of the given game as the piece codes of its 90 playing squares followed by a turn byte"""
+    return game.get_squares() + (b"\x00" if game.get_turn() == "red" else b"\x01")
+
+
+def decode_position(data):
+    """Returns a game in the position encoded by encode_position"""
+    return XiangqiGame.from_squares(data[:len(SQUARES)], "red" if data[len(SQUARES)] == 0 else "black")
+
+
+def _start_worker(megabytes):
+    """Sets up the transposition table of a worker process with the given number of megabytes"""
+    global _worker_table
+    _worker_table = TranspositionTable(megabytes) if megabytes > 0 else None
+
+
+def _search_move(position, move, depth, alpha, deadline, node_limit):
+    """
+    Searches the given root move of the encoded position in a worker process, and returns its SearchResult, or None if
+    the wall-clock deadline or node budget ran out first
+    """
+    game = decode_position(position)
+    time_limit = None if deadline is None else max(deadline - time.time(), 0.0)
+    return XiangqiEngine(game, _worker_table).search_move(move, depth, alpha, time_limit, node_limit)
+
+
+class ParallelSearch:
+    """
+    Represents a root-splitting search over a pool of worker processes, with data members for the number of workers,
+    the megabytes of transposition table of each worker, and the pool itself
+    """
+    def __init__(self, workers=None, megabytes=16):
+        """Returns a search over the given number of worker processes, or one per processor if not given"""
+        self._workers = workers or os.cpu_count() or 1
+        self._megabytes = megabytes
+        self._pool = ProcessPoolExecutor(self._workers, initializer=_start_worker, initargs=(megabytes,))
+
+    def __enter__(self):
+        """Returns the search itself for use in a with statement"""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Shuts the pool down at the end of a with statement"""
+        self.close()
+
+    def get_workers(self):
+        """Returns the number of worker processes"""
+        return self._workers
+
+    def close(self):
+        """Shuts the pool of worker processes down"""
+        self._pool.shutdown(cancel_futures=True)
+
+    def search(self, game, max_depth=64, time_limit=None, node_limit=None, info=None):
+        """
+        Searches the position of the given game with iterative deepening up to the given depth, stopping early when the
+        given number of seconds or nodes has been used up, and returns a SearchResult for the last completed iteration.
+        The first root move of an iteration may use all of the nodes left, and the nodes left after it are split evenly
+        between the other root moves searched at the same time. As the engine checks its budget every 1024 nodes, a
+        search may go over the node limit by up to 1024 nodes per root move. If given, info is called with the
+        SearchResult of every completed iteration.
+        """
+        start = time.time()
+        deadline = start + time_limit if time_limit is not None else None
+        position = encode_position(game)
+        root_moves = list(Rules.generate_legal_moves(game.board(), COLOR[game.get_turn()], game.get_game_state(),
+                                                     game.is_in_check(game.get_turn())))
+
+        result = SearchResult(None, 0, [], 0, 0, 0.0)
+        nodes = 0
+        if not root_moves:
+            return result
+
+        for depth in range(1, max_depth + 1):
+            budget = None if node_limit is None else node_limit - nodes
+            if budget is not None and budget <= 0:
+                break
+
+            # search the first root move alone, so the others can be searched against its score
+            best = self._pool.submit(_search_move, position, root_moves[0], depth, -INFINITY, deadline, budget).result()
+            if best is None:
+                break
+            nodes += best.get_nodes()
+            scores = {root_moves[0]: best.get_score()}
+
+            # split the nodes left between the remaining root moves, which are searched at the same time
+            share = None
+            if node_limit is not None and len(root_moves) > 1:
+                if node_limit - nodes <= 0:
+                    break
+                share = max((node_limit - nodes) // (len(root_moves) - 1), 1)
+
+            # search the remaining root moves at the same time, keeping whichever scores above the best so far
+            futures = {self._pool.submit(_search_move, position, move, depth, best.get_score(), deadline, share): move
+                       for move in root_moves[1:]}
+            stopped = False
+            for future in as_completed(futures):
+                found = future.result()
+                if found is None:
+                    stopped = True
+                    continue
+                nodes += found.get_nodes()
+                scores[futures[future]] = found.get_score()
+                if found.get_score() > best.get_score():
+                    best = found
+                if node_limit is not None and nodes >= node_limit:
+                    stopped = True
+            if stopped:
+                for future in futures:
+                    future.cancel()
+                break
+
+            # search the root moves in order of their scores at the next depth
+            root_moves.sort(key=lambda move: scores[move], reverse=True)
+            result = SearchResult(best.get_move(), best.get_score(), best.get_pv(), depth, nodes, time.time() - start)
+            if info is not None:
+                info(result)
+
+            # stop deepening once a mate has been found
+            if abs(best.get_score()) >= MATE - MAX_PLY:
+                break
+
+        return SearchResult(result.get_move(), result.get_score(), result.get_pv(), result.get_depth(), nodes,
+                            time.time() - start)
+
+
+def measure_speedup(game, depth, workers, megabytes=16):
+    """
+    Searches the position of the given game to the given depth with a single worker and then with the given number of
+    workers, and returns the two SearchResults and the speedup of the second search over the first
+    """
+    results = []
+    for count in (1, workers):
+        with ParallelSearch(count, megabytes) as search:
+
+            # start every worker process before timing the search
+            search.search(game, 1)
+            results.append(search.search(game, depth))
+    single, parallel = results
+    speedup = single.get_elapsed() / parallel.get_elapsed() if parallel.get_elapsed() > 0 else 0.0
+    return single, parallel, speedup
+
+
+def main(arguments=None):
+    """Runs the parallel search command line interface with the given arguments, or the ones given to the program"""
+    parser = argparse.ArgumentParser(description="Searches a Xiangqi position for the best move over several cores.")
+    parser.add_argument("moves", nargs="*", help="moves to play from the starting position first, such as h3e3")
+    parser.add_argument("--depth", type=int, default=64, help="maximum depth to search to")
+    parser.add_argument("--time", type=float, default=None, help="seconds to search for")
+    parser.add_argument("--nodes", type=int, default=None, help="nodes to search")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes (default one per processor)")
+    parser.add_argument("--hash", type=int, default=16, metavar="MB",
+                        help="megabytes of transposition table per worker, or 0 for none (default 16)")
+    parser.add_argument("--speedup", action="store_true",
+                        help="search to the given depth with one worker and then all of them, and report the speedup")
+    args = parser.parse_args(arguments)
+
+    if args.time is None and args.nodes is None and args.depth == 64:
+        args.depth = 4
+
+    game = XiangqiGame()
+    for move in args.moves:
+        squares = parse_move(move)
+        if squares is None or not game.make_move(*squares):
+            print("illegal move:", move)
+            return 1
+
+    if args.speedup:
+        workers = args.workers or os.cpu_count() or 1
+        single, parallel, speedup = measure_speedup(game, args.depth, workers, args.hash)
+        print("1 worker:", single, "in", round(single.get_elapsed(), 3), "s")
+        print(workers, "workers:", parallel, "in", round(parallel.get_elapsed(), 3), "s")
+        print("speedup:", round(speedup, 2))
+        return 0
+
+    with ParallelSearch(args.workers, args.hash) as search:
+        result = search.search(game, args.depth, args.time, args.nodes, info=print)
+    print("bestmove", "".join(result.get_move()) if result.get_move() is not None else "none")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
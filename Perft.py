@@ -0,0 +1,177 @@
+# Date: October 18, 2026
+# Description: Perft benchmark and correctness suite for the rules of the XiangqiGame program. Counts the leaf nodes of
+#              the game tree of legal moves to a given depth from the starting position or from a set of reference
+#              positions, with an optional per root move breakdown, nodes per second, and a bounded hash-keyed cache of
+#              subtree counts. The reference node counts are checked against every change to the rules code.
+
+import argparse
+import time
+
+from XiangqiGame import XiangqiGame, Rules, COLOR, parse_square, square_name
+
+# reference positions reached by playing the given moves from the starting position, with their node counts from
+# depth 1 upwards. The starting position counts are the published ones for Xiangqi
+REFERENCE_POSITIONS = {
+    "start": ((), (44, 1920, 79666, 3290240)),
+    "central-cannon": ((("h3", "e3"), ("h8", "e8"), ("h1", "g3"), ("h10", "g8")), (34, 1120, 38109, 1294151)),
+    "cannon-check": ((("b3", "e3"), ("h8", "e8"), ("e3", "e7")), (9, 368, 12102, 481025)),
+    "river-crossing": ((("c4", "c5"), ("c7", "c6"), ("c5", "c6"), ("g7", "g6"), ("c6", "d6"), ("b8", "b4")),
+                       (42, 1761, 71949, 2912472)),
+}
+
+
+class PerftCache:
+    """
+    Represents a bounded cache of subtree node counts keyed by the Zobrist key of a position and the remaining depth.
+    Entries live in a fixed number of slots indexed by the key, and a new entry always replaces the old one in its slot
+    """
+    def __init__(self, size):
+        """Returns an empty cache with the given number of slots"""
+        self._size = size
+        self._keys = [None] * size
+        self._counts = [0] * size
+        self._hits = 0
+
+    def get(self, key, depth):
+        """Returns the cached node count for the given key and depth, or None if it is not cached"""
+        slot = (key ^ depth) % self._size
+        if self._keys[slot] == (key, depth):
+            self._hits += 1
+            return self._counts[slot]
+        return None
+
+    def put(self, key, depth, count):
+        """Caches the node count for the given key and depth"""
+        slot = (key ^ depth) % self._size
+        self._keys[slot] = (key, depth)
+        self._counts[slot] = count
+
+    def get_hits(self):
+        """Returns the number of lookups answered from the cache"""
+        return self._hits
+
+
+def perft(game, depth, cache=None):
+    """
+    Returns the number of leaf nodes of the game tree of legal moves to the given depth from the position of the given
+    game. Walks the tree with push_move and pop_move, so the game is left as it was. Moves at the last level are
+    counted without being made. A depth of 0 or less counts the position itself. If a PerftCache is given, subtree
+    counts are reused through it
+    """
+    if depth <= 0:
+        return 1
+
+    if cache is not None:
+        count = cache.get(game.get_key(), depth)
+        if count is not None:
+            return count
+
+    board = game.board()
+    player = COLOR[game.get_turn()]
+    in_check = game.is_in_check(game.get_turn())
+    count = 0
+    for square_from, square_to in list(Rules.generate_moves(board, player)):
+        if Rules.is_safe_move(board, player, square_from, square_to, in_check) is True:
+            if depth == 1:
+                count += 1
+            else:
+                game.push_move(square_from, square_to)
+                count += perft(game, depth - 1, cache)
+                game.pop_move()
+
+    if cache is not None:
+        cache.put(game.get_key(), depth, count)
+    return count
+
+
+def divide(game, depth, cache=None):
+    """Returns a list of (from, to) algebraically-notated root moves of the given game with the node count below each"""
+    board = game.board()
+    player = COLOR[game.get_turn()]
+    in_check = game.is_in_check(game.get_turn())
+    counts = []
+    for square_from, square_to in list(Rules.generate_moves(board, player)):
+        if Rules.is_safe_move(board, player, square_from, square_to, in_check) is True:
+            game.push_move(square_from, square_to)
+            counts.append((square_name(square_from), square_name(square_to), perft(game, depth - 1, cache)))
+            game.pop_move()
+    return counts
+
+
+def reference_game(name):
+    """Returns a game in the reference position with the given name"""
+    game = XiangqiGame()
+    for from_square, to_square in REFERENCE_POSITIONS[name][0]:
+        game.push_move(parse_square(from_square), parse_square(to_square))
+    return game
+
+
+def check_references(max_nodes, cache=None):
+    """
+    Runs perft on every reference position at every depth whose reference count is at most the given number of nodes,
+    printing each result. Returns True if every count matches its reference count
+    """
+    passed = True
+    for name, (moves, counts) in REFERENCE_POSITIONS.items():
+        game = reference_game(name)
+        for depth, expected in enumerate(counts, 1):
+            if expected > max_nodes:
+                break
+            start = time.perf_counter()
+            count = perft(game, depth, cache)
+            elapsed = time.perf_counter() - start
+            result = "ok" if count == expected else "FAILED, expected " + str(expected)
+            print(name, "depth", depth, count, "nodes", format_rate(count, elapsed), result)
+            if count != expected:
+                passed = False
+    return passed
+
+
+def format_rate(count, elapsed):
+    """Returns the nodes per second for the given node count and elapsed seconds as a string"""
+    if elapsed <= 0:
+        return "(- nps)"
+    return "(" + str(int(count / elapsed)) + " nps)"
+
+
+def main(arguments=None):
+    """Runs the perft command line interface with the given arguments, or the ones given to the program"""
+    parser = argparse.ArgumentParser(description="Counts leaf nodes of the Xiangqi game tree to measure and check "
+                                                 "move generation.")
+    parser.add_argument("depth", type=int, nargs="?", default=3, help="depth to count to (default 3)")
+    parser.add_argument("--position", default="start", choices=sorted(REFERENCE_POSITIONS),
+                        help="reference position to count from (default start)")
+    parser.add_argument("--divide", action="store_true", help="print the node count below each root move")
+    parser.add_argument("--cache", type=int, default=0, metavar="SLOTS",
+                        help="reuse subtree counts through a cache with the given number of slots")
+    parser.add_argument("--check", type=int, default=0, metavar="NODES",
+                        help="check every reference count of at most the given number of nodes instead")
+    args = parser.parse_args(arguments)
+    if args.divide and args.depth < 1:
+        parser.error("--divide needs a depth of at least 1")
+
+    cache = PerftCache(args.cache) if args.cache > 0 else None
+
+    if args.check > 0:
+        return 0 if check_references(args.check, cache) else 1
+
+    game = reference_game(args.position)
+    start = time.perf_counter()
+    if args.divide:
+        counts = divide(game, args.depth, cache)
+        for from_square, to_square, count in counts:
+            print(from_square + to_square + ":", count)
+        count = sum(count for from_square, to_square, count in counts)
+        print("moves:", len(counts))
+    else:
+        count = perft(game, args.depth, cache)
+    elapsed = time.perf_counter() - start
+
+    print("nodes:", count, format_rate(count, elapsed))
+    if cache is not None:
+        print("cache hits:", cache.get_hits())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,159 @@
+# Date: October 18, 2026
+# Description: Compact binary positions for the XiangqiGame program. A position packs into 46 bytes: the piece on each
+#              of the 90 playing squares as a 4-bit nibble, two squares to a byte in row-major order from a1 to i10,
+#              followed by a byte for the player with turn. The PositionWriter class appends packed positions to a file,
+#              and the PositionDataset class memory-maps such a file for random access to any record without reading
+#              the file or copying the record.
+
+import mmap
+
+from XiangqiGame import XiangqiGame, RED, BLACK, EMPTY, TYPE_MASK, SQUARES
+
+# bytes of a packed position: two squares a byte, and a byte for the turn
+BOARD_BYTES = len(SQUARES) // 2
+RECORD_SIZE = BOARD_BYTES + 1
+
+# nibble of every piece code, with red pieces as their type and black pieces as their type plus seven
+NIBBLES = {EMPTY: 0}
+for _piece_type in range(1, TYPE_MASK + 1):
+    NIBBLES[RED | _piece_type] = _piece_type
+    NIBBLES[BLACK | _piece_type] = _piece_type + TYPE_MASK
+del _piece_type
+
+# packed bytes of every pair of codes on two neighbouring squares, and the two codes of every packed byte
+PAIR_BYTES = {(first, second): NIBBLES[first] << 4 | NIBBLES[second] for first in NIBBLES for second in NIBBLES}
+BYTE_PAIRS = {byte: pair for pair, byte in PAIR_BYTES.items()}
+
+
+def pack_position(game):
+    """Returns the position of the given game packed into RECORD_SIZE bytes"""
+    codes = game.get_squares()
+    packed = bytearray(RECORD_SIZE)
+    for index in range(BOARD_BYTES):
+        packed[index] = PAIR_BYTES[codes[2 * index], codes[2 * index + 1]]
+    packed[BOARD_BYTES] = 0 if game.get_turn() == "red" else 1
+    return bytes(packed)
+
+
+def unpack_squares(data):
+    """Returns the piece codes on the 90 playing squares of the given packed position, in the order of get_squares"""
+    codes = bytearray(len(SQUARES))
+    for index in range(BOARD_BYTES):
+        if data[index] not in BYTE_PAIRS:
+            raise ValueError("invalid packed position")
+        codes[2 * index], codes[2 * index + 1] = BYTE_PAIRS[data[index]]
+    return bytes(codes)
+
+
+def unpack_turn(data):
+    """Returns the player with turn of the given packed position"""
+    return "red" if data[BOARD_BYTES] == 0 else "black"
+
+
+def unpack_position(data):
+    """Returns a game in the given packed position"""
+    if len(data) != RECORD_SIZE:
+        raise ValueError("expected " + str(RECORD_SIZE) + " bytes")
+    return XiangqiGame.from_squares(unpack_squares(data), unpack_turn(data))
+
+
+class PositionWriter:
+    """Represents a file of packed positions being written, with data members for the file and the records written"""
+    def __init__(self, path, append=False):
+        """Returns a writer of a new file at the given path, or of the end of an existing one if append is True"""
+        self._file = open(path, "ab" if append else "wb")
+        self._count = 0
+
+    def __enter__(self):
+        """Returns the writer itself for use in a with statement"""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Closes the file at the end of a with statement"""
+        self.close()
+
+    def write(self, game):
+        """Appends the position of the given game to the file"""
+        self._file.write(pack_position(game))
+        self._count += 1
+
+    def write_packed(self, data):
+        """Appends the given packed position to the file"""
+        if len(data) != RECORD_SIZE:
+            raise ValueError("expected " + str(RECORD_SIZE) + " bytes")
+        self._file.write(data)
+        self._count += 1
+
+    def get_count(self):
+        """Returns the number of positions written"""
+        return self._count
+
+    def close(self):
+        """Closes the file"""
+        self._file.close()
+
+
+class PositionDataset:
+    """
+    Represents a file of packed positions mapped into memory, with data members for the file, the memory map and the
+    number of records. Records are read from the map only when they are accessed, so files far larger than memory can
+    be indexed at random
+    """
+    def __init__(self, path):
+        """Returns a dataset of the file of packed positions at the given path"""
+        self._file = open(path, "rb")
+        size = self._file.seek(0, 2)
+        if size % RECORD_SIZE != 0:
+            self._file.close()
+            raise ValueError("file size is not a multiple of " + str(RECORD_SIZE) + " bytes")
+
+        # an empty file cannot be mapped, but holds no records either
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._view = memoryview(self._map) if size else memoryview(b"")
+        self._count = size // RECORD_SIZE
+
+    def __enter__(self):
+        """Returns the dataset itself for use in a with statement"""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Unmaps and closes the file at the end of a with statement"""
+        self.close()
+
+    def __len__(self):
+        """Returns the number of positions in the dataset"""
+        return self._count
+
+    def __getitem__(self, index):
+        """Returns a memoryview of the packed position with the given index, without copying it"""
+        if index < 0:
+            index += self._count
+        if index < 0 or index >= self._count:
+            raise IndexError("position index out of range")
+        return self._view[index * RECORD_SIZE:(index + 1) * RECORD_SIZE]
+
+    def __iter__(self):
+        """Yields a memoryview of every packed position in order"""
+        for index in range(self._count):
+            yield self._view[index * RECORD_SIZE:(index + 1) * RECORD_SIZE]
+
+    def get_game(self, index):
+        """Returns a game in the position with the given index"""
+        return unpack_position(self[index])
+
+    def get_turn(self, index):
+        """Returns the player with turn in the position with the given index"""
+        return unpack_turn(self[index])
+
+    def close(self):
+        """
+        Unmaps and closes the file. Records taken from the dataset share its memory, so they have to be dropped or
+        released before it is closed, or BufferError is raised. The file is closed either way, and closing again once
+        the records are gone unmaps it
+        """
+        try:
+            self._view.release()
+            if self._map is not None:
+                self._map.close()
+        finally:
+            self._file.close()
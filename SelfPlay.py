@@ -0,0 +1,191 @@
+# Date: October 18, 2026
+# Description: Self-play simulation runner for the XiangqiGame program. Plays any number of games between two move
+#              policies over a pool of worker processes, where a policy is given by name: random moves, greedy captures,
+#              or the XiangqiEngine at a fixed depth. Games are played with push_move instead of make_move so nothing is
+#              printed, and the result of each game, the winner, length and reason the game ended, is streamed to a file
+#              as a line of JSON while the games per second and moves per second are reported.
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from XiangqiGame import XiangqiGame, Rules, COLOR, EMPTY, TYPE_MASK, parse_square
+from XiangqiEngine import XiangqiEngine, PIECE_VALUES
+
+
+class RandomPolicy:
+    """Represents a move policy that plays a random legal move"""
+    def choose(self, game, moves, rng):
+        """Returns one of the given legal moves of the given game, as (from, to) board index pairs, at random"""
+        return rng.choice(moves)
+
+
+class GreedyCapturePolicy:
+    """Represents a move policy that captures the most valuable piece it can, and plays a random move otherwise"""
+    def choose(self, game, moves, rng):
+        """Returns the legal move capturing the most valuable piece, or a random legal move if there is no capture"""
+        board = game.board()
+        best_value = 0
+        best_moves = []
+        for move in moves:
+            captured = board[move[1]]
+            if captured == EMPTY:
+                continue
+            value = PIECE_VALUES[captured & TYPE_MASK]
+            if value > best_value:
+                best_value = value
+                best_moves = [move]
+            elif value == best_value:
+                best_moves.append(move)
+        return rng.choice(best_moves or moves)
+
+
+class EnginePolicy:
+    """Represents a move policy that plays the best move of the XiangqiEngine searched to a fixed depth"""
+    def __init__(self, depth):
+        """Returns a policy searching to the given depth"""
+        self._depth = depth
+
+    def choose(self, game, moves, rng):
+        """Returns the best move found by the engine, as a (from, to) pair of board indexes"""
+        from_square, to_square = XiangqiEngine(game).search(self._depth).get_move()
+        return parse_square(from_square), parse_square(to_square)
+
+
+def make_policy(spec):
+    """
+    Returns the move policy named by the given spec: "random", "greedy", or "engine" optionally followed by a colon and
+    a depth of at least 1, such as "engine:2"
+    """
+    name, _, argument = spec.partition(":")
+    if name == "random":
+        return RandomPolicy()
+    if name == "greedy":
+        return GreedyCapturePolicy()
+    if name == "engine":
+        depth = int(argument) if argument else 1
+        if depth < 1:
+            raise ValueError("engine depth must be at least 1: " + spec)
+        return EnginePolicy(depth)
+    raise ValueError("unknown policy: " + spec)
+
+
+def play_game(red, black, seed, max_moves=200):
+    """
+    Plays a game between the given red and black move policies with a random number generator seeded with the given
+    seed, up to the given number of moves, and returns the game and the number of moves made
+    """
+    game = XiangqiGame()
+    policies = {"red": red, "black": black}
+    rng = random.Random(seed)
+    moves_made = 0
+    while moves_made < max_moves:
+        turn = game.get_turn()
+        moves = list(Rules.generate_legal_moves(game.board(), COLOR[turn], game.get_game_state(),
+                                                game.is_in_check(turn)))
+
+        # a player with no legal move has lost, which check_or_stale records in the game state
+        if not moves:
+            game.check_or_stale()
+            break
+        game.push_move(*policies[turn].choose(game, moves, rng))
+        moves_made += 1
+
+    # the last move allowed may also have left the player with turn without a legal move
+    if moves_made == max_moves:
+        game.check_or_stale()
+    return game, moves_made
+
+
+def _play(task):
+    """Plays the game of the given (number, red spec, black spec, seed, max moves) task and returns its result record"""
+    number, red_spec, black_spec, seed, max_moves = task
+    game, moves_made = play_game(make_policy(red_spec), make_policy(black_spec), seed, max_moves)
+
+    # a finished game ended in checkmate if the loser was left in check, and in stalemate otherwise
+    state = game.get_game_state()
+    if state == "RED_WON":
+        winner = "red"
+    elif state == "BLACK_WON":
+        winner = "black"
+    else:
+        winner = None
+    if winner is None:
+        reason = "move limit"
+    elif game.is_in_check("black" if winner == "red" else "red"):
+        reason = "checkmate"
+    else:
+        reason = "stalemate"
+    return {"game": number, "red": red_spec, "black": black_spec, "seed": seed, "state": state, "winner": winner,
+            "moves": moves_made, "reason": reason}
+
+
+def run(games, red="random", black="random", workers=None, max_moves=200, seed=0, output=None):
+    """
+    Plays the given number of games between the red and black policy specs over the given number of worker processes,
+    writing the result record of each game as a line of JSON to the given file object, if any, as it comes in. Returns
+    a dictionary of the games and moves played, the wins of each player, the seconds taken, and the games and moves
+    per second
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [(number, red, black, seed + number, max_moves) for number in range(games)]
+    summary = {"games": 0, "moves": 0, "red": 0, "black": 0, "unfinished": 0}
+    start = time.perf_counter()
+
+    # hand the games out in chunks, a few per worker, and stream the results back in game order
+    with ProcessPoolExecutor(workers) as pool:
+        for record in pool.map(_play, tasks, chunksize=max(1, games // (4 * workers))):
+            if output is not None:
+                output.write(json.dumps(record) + "\n")
+            summary["games"] += 1
+            summary["moves"] += record["moves"]
+            summary[record["winner"] or "unfinished"] += 1
+    elapsed = time.perf_counter() - start
+
+    summary["seconds"] = elapsed
+    summary["games_per_second"] = summary["games"] / elapsed if elapsed > 0 else 0.0
+    summary["moves_per_second"] = summary["moves"] / elapsed if elapsed > 0 else 0.0
+    return summary
+
+
+def main(arguments=None):
+    """Runs the self-play command line interface with the given arguments, or the ones given to the program"""
+    parser = argparse.ArgumentParser(description="Plays Xiangqi games between two move policies.")
+    parser.add_argument("games", type=int, nargs="?", default=100, help="number of games to play (default 100)")
+    parser.add_argument("--red", default="random", help="policy of red: random, greedy or engine:DEPTH")
+    parser.add_argument("--black", default="random", help="policy of black: random, greedy or engine:DEPTH")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes (default one per processor)")
+    parser.add_argument("--max-moves", type=int, default=200, help="moves after which a game is stopped (default 200)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game, counting up for the rest")
+    parser.add_argument("--output", default=None, help="file to write a line of JSON per game to, or - for stdout")
+    args = parser.parse_args(arguments)
+
+    # check the policy specs before starting any worker process
+    for spec in (args.red, args.black):
+        try:
+            make_policy(spec)
+        except ValueError as error:
+            parser.error(str(error))
+
+    if args.output == "-":
+        summary = run(args.games, args.red, args.black, args.workers, args.max_moves, args.seed, sys.stdout)
+    elif args.output is not None:
+        with open(args.output, "w") as output:
+            summary = run(args.games, args.red, args.black, args.workers, args.max_moves, args.seed, output)
+    else:
+        summary = run(args.games, args.red, args.black, args.workers, args.max_moves, args.seed)
+
+    print("games:", summary["games"], "red wins:", summary["red"], "black wins:", summary["black"],
+          "unfinished:", summary["unfinished"])
+    print("moves:", summary["moves"], "in", round(summary["seconds"], 3), "s")
+    print("games/s:", round(summary["games_per_second"], 2), "moves/s:", round(summary["moves_per_second"], 1))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,424 @@
+# Date: October 18, 2026
+# Description: Multi-game session server for the XiangqiGame program. The SessionServer class hosts any number of games
+#              keyed by game id over a local TCP connection speaking JSON lines: every request is a line such as
+#              {"id": 1, "op": "move", "game": "g1", "from": "h3", "to": "e3"} and is answered with a line carrying the
+#              same id. Moves and legal move lists are worked out in a pool of worker processes, so one slow checkmate
+#              scan never holds up the event loop serving the other games. Clients subscribed to a game are sent a line
+#              for every move made in it. The run_load function plays many games at once against a server and reports
+#              the median and 99th percentile move latency.
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from XiangqiGame import XiangqiGame, EMPTY, NAMES, parse_move, parse_square
+from ParallelSearch import encode_position, decode_position
+
+# requests a client can make, and the fields each one needs besides the op
+OPERATIONS = {"create": (), "move": ("game", "from", "to"), "state": ("game",), "legal": ("game",),
+              "subscribe": ("game",), "unsubscribe": ("game",)}
+
+# fields of a request that have to be strings when given
+STRING_FIELDS = ("game", "fen", "from", "to")
+
+# longest request line read, in bytes
+MAX_LINE = 65536
+
+
+def _evaluate_move(position, from_square, to_square):
+    """
+    Makes the given move in the encoded position in a worker process. Returns None and whether the move only failed by
+    exposing the player's own general if it is illegal, and otherwise the code of the piece captured, whether the move
+    gives check, the game state after it and the legal moves of the opposing player
+    """
+    game = decode_position(position)
+    result = game.make_move(from_square, to_square)
+    if not result:
+        return None, result.is_self_check()
+    return (result.get_captured(), result.is_check(), result.get_game_state(), game.legal_moves()), False
+
+
+def _evaluate_legal_moves(position):
+    """Returns the legal moves of the player with turn in the encoded position, in a worker process"""
+    return decode_position(position).legal_moves()
+
+
+class GameSession:
+    """
+    Represents a game hosted by the server, with data members for the game, a lock keeping its moves in order, the
+    legal moves of the player with turn once they are known, and the connections subscribed to it
+    """
+    def __init__(self, game):
+        """Returns a session of the given game"""
+        self._game = game
+        self._lock = asyncio.Lock()
+        self._legal_moves = None
+        self._subscribers = set()
+
+    def get_game(self):
+        """Returns the game"""
+        return self._game
+
+    def get_lock(self):
+        """Returns the lock held while a move of the game is worked out"""
+        return self._lock
+
+    def get_legal_moves(self):
+        """Returns the legal moves of the player with turn, or None if they are not known yet"""
+        return self._legal_moves
+
+    def set_legal_moves(self, moves):
+        """Sets the legal moves of the player with turn"""
+        self._legal_moves = moves
+
+    def get_subscribers(self):
+        """Returns the set of stream writers of the connections subscribed to the game"""
+        return self._subscribers
+
+    def describe(self):
+        """Returns a dictionary of the FEN, turn, game state and check statuses of the game"""
+        game = self._game
+        return {"fen": game.to_fen(), "turn": game.get_turn(), "state": game.get_game_state(),
+                "red_in_check": game.is_in_check("red"), "black_in_check": game.is_in_check("black")}
+
+
+class SessionServer:
+    """
+    Represents a server of game sessions with data members for the sessions by game id, the number of games created,
+    and the pool of worker processes the rules are evaluated in, or None to evaluate them on the event loop itself
+    """
+    def __init__(self, workers=None):
+        """
+        Returns a server evaluating the rules in the given number of worker processes, one per processor if not given,
+        or on the event loop if zero
+        """
+        self._sessions = {}
+        self._created = 0
+        self._handlers = set()
+
+        # workers are started fresh rather than forked, since a forked worker would hold on to copies of the open
+        # client sockets and keep them from ever closing
+        self._pool = None
+        if workers != 0:
+            self._pool = ProcessPoolExecutor(workers or os.cpu_count() or 1,
+                                             mp_context=multiprocessing.get_context("spawn"))
+
+    def get_sessions(self):
+        """Returns a dictionary of the GameSession objects by game id"""
+        return self._sessions
+
+    async def wait_closed(self):
+        """Waits until every connection being served has been closed"""
+        if self._handlers:
+            await asyncio.wait(list(self._handlers))
+
+    def close(self):
+        """Shuts the pool of worker processes down"""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """Starts serving connections on the given host and port, and returns the asyncio server"""
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_LINE)
+
+    async def _evaluate(self, function, *arguments):
+        """Returns the result of the given function of the given arguments, worked out in the pool if there is one"""
+        if self._pool is None:
+            return function(*arguments)
+        return await asyncio.get_running_loop().run_in_executor(self._pool, function, *arguments)
+
+    async def handle(self, reader, writer):
+        """Answers the requests of a connection one line at a time until it is closed"""
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response = await self.respond(line, writer)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for session in self._sessions.values():
+                session.get_subscribers().discard(writer)
+            writer.close()
+            self._handlers.discard(handler)
+
+    async def respond(self, line, writer=None):
+        """
+        Returns the response to the given request line as a dictionary, with "ok" True and the fields of the answer, or
+        "ok" False and an "error" message. Subscriptions are made for the given stream writer
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {"ok": False, "error": "invalid JSON"}
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "expected a JSON object"}
+        response = {"id": request["id"]} if "id" in request else {}
+
+        operation = request.get("op")
+        if not isinstance(operation, str):
+            response.update(ok=False, error="missing op" if operation is None else "expected a string for op")
+            return response
+        if operation not in OPERATIONS:
+            response.update(ok=False, error="unknown op: " + str(operation))
+            return response
+        missing = [field for field in OPERATIONS[operation] if field not in request]
+        if missing:
+            response.update(ok=False, error="missing " + ", ".join(missing))
+            return response
+        wrong = [field for field in STRING_FIELDS if field in request and not isinstance(request[field], str)]
+        if wrong:
+            response.update(ok=False, error="expected a string for " + ", ".join(wrong))
+            return response
+        if operation != "create" and request["game"] not in self._sessions:
+            response.update(ok=False, error="unknown game: " + str(request["game"]))
+            return response
+
+        try:
+            response.update(await getattr(self, "_" + operation)(request, writer))
+        except ValueError as error:
+            response.update(ok=False, error=str(error))
+        return response
+
+    async def _create(self, request, writer):
+        """Creates a game from the starting position, or from the given FEN, under the given or a new game id"""
+        game_id = request.get("game")
+        if game_id in self._sessions:
+            raise ValueError("game already exists: " + game_id)
+
+        # build the game before taking a new id, so a bad FEN does not use one up
+        game = XiangqiGame.from_fen(request["fen"]) if "fen" in request else XiangqiGame()
+        if game_id is None:
+            self._created += 1
+            game_id = "g" + str(self._created)
+            while game_id in self._sessions:
+                self._created += 1
+                game_id = "g" + str(self._created)
+        self._sessions[game_id] = GameSession(game)
+        return {"ok": True, "game": game_id}
+
+    async def _move(self, request, writer):
+        """Makes the given move in the given game if it is legal, and tells the game's subscribers"""
+        game_id = request["game"]
+        session = self._sessions[game_id]
+        from_square = request["from"]
+        to_square = request["to"]
+        if parse_location(from_square) is None or parse_location(to_square) is None:
+            raise ValueError("invalid location")
+
+        # moves of a game are worked out one at a time, each from the position the last one left
+        async with session.get_lock():
+            game = session.get_game()
+            if game.get_game_state() != "UNFINISHED":
+                return {"ok": True, "legal": False, "reason": "game over", "state": game.get_game_state()}
+            outcome, self_check = await self._evaluate(_evaluate_move, encode_position(game), from_square, to_square)
+            if outcome is None:
+                return {"ok": True, "legal": False, "reason": "self check" if self_check else "illegal move"}
+
+            # apply the move the worker made to the hosted game, together with the end of the game if it came
+            captured, check, state, legal_moves = outcome
+            player = game.get_turn()
+            game.push_move(parse_square(from_square), parse_square(to_square))
+            if state != "UNFINISHED":
+                game.set_game_state(state)
+                game.set_turn(player)
+            session.set_legal_moves(legal_moves if state == "UNFINISHED" else ())
+
+        answer = {"ok": True, "legal": True, "move": from_square + to_square, "player": player,
+                  "capture": NAMES[captured].strip() if captured != EMPTY else None, "check": check, "state": state,
+                  "turn": game.get_turn()}
+        self._broadcast(game_id, answer, writer)
+        return answer
+
+    async def _state(self, request, writer):
+        """Returns the position and state of the given game"""
+        answer = {"ok": True}
+        answer.update(self._sessions[request["game"]].describe())
+        return answer
+
+    async def _legal(self, request, writer):
+        """Returns the legal moves of the player with turn in the given game, working them out if they are not known"""
+        session = self._sessions[request["game"]]
+        async with session.get_lock():
+            if session.get_legal_moves() is None:
+                game = session.get_game()
+                if game.get_game_state() != "UNFINISHED":
+                    session.set_legal_moves(())
+                else:
+                    session.set_legal_moves(await self._evaluate(_evaluate_legal_moves, encode_position(game)))
+            moves = session.get_legal_moves()
+        return {"ok": True, "moves": [from_square + to_square for from_square, to_square in moves]}
+
+    async def _subscribe(self, request, writer):
+        """Subscribes the connection to the moves of the given game"""
+        if writer is None:
+            raise ValueError("no connection to subscribe")
+        self._sessions[request["game"]].get_subscribers().add(writer)
+        return {"ok": True}
+
+    async def _unsubscribe(self, request, writer):
+        """Unsubscribes the connection from the moves of the given game"""
+        self._sessions[request["game"]].get_subscribers().discard(writer)
+        return {"ok": True}
+
+    def _broadcast(self, game_id, answer, writer):
+        """Sends an event line for the given move to every subscriber of the given game but the connection making it"""
+        subscribers = self._sessions[game_id].get_subscribers()
+        if not subscribers:
+            return
+        event = dict(answer, event="move", game=game_id)
+        del event["ok"]
+        line = json.dumps(event).encode() + b"\n"
+        for subscriber in list(subscribers):
+            if subscriber is writer:
+                continue
+            if subscriber.is_closing():
+                subscribers.discard(subscriber)
+            else:
+                subscriber.write(line)
+
+
+def parse_location(text):
+    """Returns the board index of the given algebraically-notated location, or None if it is not one"""
+    if len(text) < 2 or not text[1:].isdigit():
+        return None
+    return parse_square(text)
+
+
+def percentile(values, fraction):
+    """Returns the value at the given fraction of the sorted given values, by the nearest rank"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(-(-fraction * len(ordered) // 1)) - 1))]
+
+
+async def _play_client(host, port, max_moves, rng, latencies):
+    """Plays a game of random legal moves over its own connection, adding the seconds every move took to latencies"""
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+    number = 0
+
+    async def request(**fields):
+        """Sends a request and returns the response"""
+        nonlocal number
+        number += 1
+        fields["id"] = number
+        writer.write(json.dumps(fields).encode() + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())
+
+    game_id = (await request(op="create"))["game"]
+    moves = 0
+    while moves < max_moves:
+        legal = (await request(op="legal", game=game_id))["moves"]
+        if not legal:
+            break
+        from_square, to_square = parse_move(rng.choice(legal))
+        start = time.perf_counter()
+        response = await request(op="move", game=game_id, **{"from": from_square, "to": to_square})
+        latencies.append(time.perf_counter() - start)
+        moves += 1
+        if response.get("state") != "UNFINISHED":
+            break
+    writer.close()
+    await writer.wait_closed()
+    return moves
+
+
+async def run_load(games, max_moves=100, host="127.0.0.1", port=None, workers=None, seed=0):
+    """
+    Plays the given number of games of random legal moves at once, each over its own connection, against the server on
+    the given host and port, or against a server started on a free port with the given number of workers if no port is
+    given. Returns a dictionary of the games, moves, seconds, moves per second, and the median and 99th percentile move
+    latency in milliseconds
+    """
+    server = None
+    if port is None:
+        server = SessionServer(workers)
+        listener = await server.start(host, 0)
+        port = listener.sockets[0].getsockname()[1]
+
+    rng = random.Random(seed)
+    latencies = []
+    start = time.perf_counter()
+    try:
+        played = await asyncio.gather(*(_play_client(host, port, max_moves, random.Random(rng.random()), latencies)
+                                        for number in range(games)))
+    finally:
+        if server is not None:
+            await server.wait_closed()
+            listener.close()
+            await listener.wait_closed()
+            server.close()
+    elapsed = time.perf_counter() - start
+
+    return {"games": games, "moves": sum(played), "seconds": elapsed,
+            "moves_per_second": sum(played) / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": 1000 * percentile(latencies, 0.5) if latencies else None,
+            "p99_ms": 1000 * percentile(latencies, 0.99) if latencies else None}
+
+
+async def serve(host, port, workers):
+    """Serves game sessions on the given host and port until interrupted"""
+    server = SessionServer(workers)
+    listener = await server.start(host, port)
+    print("serving on", host + ":" + str(listener.sockets[0].getsockname()[1]))
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(arguments=None):
+    """Runs the session server command line interface with the given arguments, or the ones given to the program"""
+    parser = argparse.ArgumentParser(description="Hosts Xiangqi games over a local JSON-lines protocol.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="serve game sessions")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="host to listen on (default 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=8765, help="port to listen on (default 8765)")
+    serve_parser.add_argument("--workers", type=int, default=None,
+                              help="worker processes evaluating the rules (default one per processor, 0 for none)")
+    load_parser = commands.add_parser("load", help="measure move latency with many games at once")
+    load_parser.add_argument("--games", type=int, default=100, help="number of games played at once (default 100)")
+    load_parser.add_argument("--moves", type=int, default=100, help="most moves of every game (default 100)")
+    load_parser.add_argument("--host", default="127.0.0.1", help="host of the server (default 127.0.0.1)")
+    load_parser.add_argument("--port", type=int, default=None,
+                             help="port of a running server (default start one on a free port)")
+    load_parser.add_argument("--workers", type=int, default=None,
+                             help="worker processes of the server started (default one per processor, 0 for none)")
+    load_parser.add_argument("--seed", type=int, default=0, help="seed of the random moves (default 0)")
+    args = parser.parse_args(arguments)
+
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, args.workers))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    result = asyncio.run(run_load(args.games, args.moves, args.host, args.port, args.workers, args.seed))
+    print("games:", result["games"], "moves:", result["moves"], "in", round(result["seconds"], 3), "s",
+          "(" + str(round(result["moves_per_second"], 1)) + " moves/s)")
+    if result["p50_ms"] is not None:
+        print("move latency p50:", round(result["p50_ms"], 2), "ms", "p99:", round(result["p99_ms"], 2), "ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,529 @@
+# Date: October 18, 2026
+# Description: Endgame tablebases for the XiangqiGame program. A tablebase covers every placement of a small material
+#              set, such as KR-KAA for a red general and chariot against a black general and two advisers, with either
+#              player to move, and holds whether the player with turn wins, loses or draws and in how many plies. The
+#              generate function enumerates the placements under the rules of the game, works out the moves of every
+#              placement over a pool of worker processes, and solves the table by retrograde analysis from the
+#              checkmates and stalemates back, using the tables of smaller material sets for captures. Tables are
+#              written compressed in blocks, and the Tablebase and TablebaseSet classes probe a game in constant time.
+
+import argparse
+import mmap
+import os
+import struct
+import time
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from XiangqiGame import Rules, RED, BLACK, EMPTY, OFFBOARD, TYPE_MASK, SIZE, SQUARES, PALACE, GENERAL, ADVISER, \
+    ELEPHANT, SOLDIER, ADVISER_MOVES, ELEPHANT_MOVES, SOLDIER_MOVES, FEN_CODES, FEN_LETTERS, square
+
+# order of the piece letters of a side in a material set, which is also the order of its pieces in a table
+LETTER_ORDER = "KRCNABP"
+
+# entries of a table: an invalid placement, a draw, or the distance to the end of the game in plies plus two, where an
+# odd distance is a win for the player with turn and an even distance a loss
+INVALID = 0
+DRAW = 1
+DISTANCE = 2
+MAX_DISTANCE = 255 - DISTANCE
+
+# table file layout: a header with the material set, the number of entries, the entries per block and the number of
+# blocks, then the file offset of every block and the end of the last one, then the zlib-compressed blocks
+MAGIC = b"XQTB1\x00\x00\x00"
+HEADER = struct.Struct("<16sQII")
+BLOCK_SIZE = 65536
+CACHED_BLOCKS = 64
+
+
+def normalize(material):
+    """
+    Returns the given material set, such as "kr-kaa", with each side in upper case and its letters in table order,
+    raising ValueError if either side is without a general or holds an unknown letter
+    """
+    sides = material.upper().split("-")
+    if len(sides) != 2:
+        raise ValueError("expected a material set such as KR-KAA: " + material)
+    for side in sides:
+        if side.count("K") != 1 or any(letter not in LETTER_ORDER for letter in side):
+            raise ValueError("expected one general and the letters " + LETTER_ORDER + " per side: " + material)
+    return "-".join("".join(sorted(side, key=LETTER_ORDER.index)) for side in sides)
+
+
+def material_of(board):
+    """Returns the material set of the pieces on the given game board"""
+    sides = {RED: "", BLACK: ""}
+    for index in SQUARES:
+        code = board[index]
+        if code != EMPTY:
+            sides[code & (RED | BLACK)] += FEN_LETTERS[code].upper()
+    return normalize(sides[RED] + "-" + sides[BLACK])
+
+
+def submaterials(material):
+    """Returns the material sets left by capturing each non-general piece of the given material set"""
+    red, black = normalize(material).split("-")
+    found = []
+    for index in range(1, len(red)):
+        found.append(normalize(red[:index] + red[index + 1:] + "-" + black))
+    for index in range(1, len(black)):
+        found.append(normalize(red + "-" + black[:index] + black[index + 1:]))
+    return sorted(set(found))
+
+
+def _domain(code):
+    """
+    Returns the board indexes a piece of the given code can ever stand on: the castle for generals, the squares reached
+    from their starting squares for advisers, elephants and soldiers, and the whole board for the rest
+    """
+    player = code & (RED | BLACK)
+    piece_type = code & TYPE_MASK
+    if piece_type == GENERAL:
+        return tuple(PALACE[player])
+
+    def row(number):
+        """Returns the given row counted from the player's own side"""
+        return number if player == RED else 11 - number
+
+    if piece_type == ADVISER:
+        start, moves = [square(row(1), 4), square(row(1), 6)], lambda index: ADVISER_MOVES[index]
+    elif piece_type == ELEPHANT:
+        start, moves = [square(row(1), 3), square(row(1), 7)], lambda index: ELEPHANT_MOVES[index]
+    elif piece_type == SOLDIER:
+        start = [square(row(4), column) for column in (1, 3, 5, 7, 9)]
+        moves = lambda index: SOLDIER_MOVES[player][index]
+    else:
+        return SQUARES
+
+    # collect every square reachable from the starting squares by the moves of the piece
+    reached = set(start)
+    frontier = list(start)
+    while frontier:
+        for target in moves(frontier.pop()):
+            if target not in reached:
+                reached.add(target)
+                frontier.append(target)
+    return tuple(sorted(reached))
+
+
+class TableLayout:
+    """
+    Represents the indexing of the placements of a material set, with data members for the material set, the code of
+    the piece in every slot, the squares each slot can hold and the position of each square among them, the weight of
+    every slot in an index, and the number of entries. The lowest bit of an index is the player with turn, and the
+    rest counts the squares of the slots in mixed radix
+    """
+    def __init__(self, material):
+        """Returns the layout of the given material set"""
+        self._material = normalize(material)
+        red, black = self._material.split("-")
+        self._codes = [FEN_CODES[letter] for letter in red] + [FEN_CODES[letter.lower()] for letter in black]
+        self._domains = [_domain(code) for code in self._codes]
+        self._positions = [{index: position for position, index in enumerate(domain)} for domain in self._domains]
+        self._weights = [0] * len(self._codes)
+        weight = 2
+        for slot in range(len(self._codes) - 1, -1, -1):
+            self._weights[slot] = weight
+            weight *= len(self._domains[slot])
+        self._size = weight
+
+    def get_material(self):
+        """Returns the material set"""
+        return self._material
+
+    def get_codes(self):
+        """Returns the code of the piece in every slot"""
+        return self._codes
+
+    def get_size(self):
+        """Returns the number of entries of a table of the material set"""
+        return self._size
+
+    def decode(self, index):
+        """Returns the player bit with turn and the board index of every slot of the given entry index"""
+        player = RED if index & 1 == 0 else BLACK
+        squares = []
+        for slot in range(len(self._codes)):
+            squares.append(self._domains[slot][index // self._weights[slot] % len(self._domains[slot])])
+        return player, squares
+
+    def encode(self, player, squares):
+        """Returns the entry index of the given player bit with turn and board index of every slot, or None if a square
+        cannot be held by its slot"""
+        index = 0 if player == RED else 1
+        for slot, index_square in enumerate(squares):
+            position = self._positions[slot].get(index_square)
+            if position is None:
+                return None
+            index += position * self._weights[slot]
+        return index
+
+    def move_index(self, index, slot, square_from, square_to):
+        """Returns the entry index after the piece in the given slot moves between the given board indexes"""
+        return (index ^ 1) + (self._positions[slot][square_to] - self._positions[slot][square_from]) \
+            * self._weights[slot]
+
+    def encode_board(self, board, player):
+        """Returns the entry index of the given game board with the given player bit with turn, or None if the pieces
+        on the board are not the material set or cannot be placed in its slots"""
+        free = {}
+        for slot, code in enumerate(self._codes):
+            free.setdefault(code, []).append(slot)
+        squares = [None] * len(self._codes)
+        for index in SQUARES:
+            code = board[index]
+            if code != EMPTY:
+                slots = free.get(code)
+                if not slots:
+                    return None
+                squares[slots.pop()] = index
+        if None in squares:
+            return None
+        return self.encode(player, squares)
+
+
+def _solve_moves(material, start, stop, directory):
+    """
+    Works out the moves of the entries from start up to stop of the table of the given material set in a worker
+    process. Returns the validity of every entry, the offsets of the successors of every entry into a flat array of
+    the successor entries reached without a capture, and for the captures, read from the tables of smaller material
+    sets in the given directory, the fastest win, the longest loss and whether any draws, of every entry
+    """
+    layout = TableLayout(material)
+    codes = layout.get_codes()
+    subtables = {}
+    board = bytearray([OFFBOARD]) * SIZE
+    for index in SQUARES:
+        board[index] = EMPTY
+
+    valid = bytearray(stop - start)
+    offsets = array("I", [0])
+    successors = array("I")
+    capture_win = array("H", [0]) * (stop - start)
+    capture_loss = array("H", [0]) * (stop - start)
+    capture_draw = bytearray(stop - start)
+
+    for index in range(start, stop):
+        player, squares = layout.decode(index)
+        slot_of = {}
+        for slot, index_square in enumerate(squares):
+            slot_of[index_square] = slot
+        if len(slot_of) == len(squares):
+            for slot, index_square in enumerate(squares):
+                board[index_square] = codes[slot]
+
+            # the player without the turn must not be in check, including the generals facing each other
+            if not Rules.is_in_check(board, player ^ (RED | BLACK)):
+                valid[index - start] = 1
+                in_check = Rules.is_in_check(board, player)
+                for square_from, square_to in Rules.generate_legal_moves(board, player, "UNFINISHED", in_check):
+                    slot = slot_of[square_from]
+                    if board[square_to] == EMPTY:
+                        successors.append(layout.move_index(index, slot, square_from, square_to))
+                        continue
+
+                    # a capture leaves a smaller material set, whose table holds the result for the opposing player
+                    captured = slot_of[square_to]
+                    child = submaterial_after(layout, captured)
+                    if child not in subtables:
+                        subtables[child] = Tablebase(os.path.join(directory, child + ".xtb"))
+                    child_squares = [square_to if other == slot else index_square
+                                     for other, index_square in enumerate(squares) if other != captured]
+                    entry = subtables[child].get_entry(
+                        subtables[child].get_layout().encode(player ^ (RED | BLACK), child_squares))
+                    if entry == DRAW:
+                        capture_draw[index - start] = 1
+                    elif (entry - DISTANCE) % 2 == 0:
+                        distance = entry - DISTANCE + 1
+                        if not capture_win[index - start] or distance < capture_win[index - start]:
+                            capture_win[index - start] = distance
+                    else:
+                        capture_loss[index - start] = max(capture_loss[index - start], entry - DISTANCE + 1)
+
+            for index_square in squares:
+                board[index_square] = EMPTY
+        offsets.append(len(successors))
+
+    for subtable in subtables.values():
+        subtable.close()
+    return valid, offsets, successors, capture_win, capture_loss, capture_draw
+
+
+def submaterial_after(layout, captured):
+    """Returns the material set left by capturing the piece in the given slot of the given layout"""
+    codes = [code for slot, code in enumerate(layout.get_codes()) if slot != captured]
+    return normalize("".join(FEN_LETTERS[code].upper() for code in codes if code & RED) + "-"
+                     + "".join(FEN_LETTERS[code].upper() for code in codes if code & BLACK))
+
+
+def generate(material, directory, workers=None, info=None):
+    """
+    Generates the table of the given material set into the given directory, first generating the tables of the smaller
+    material sets it needs that are not there yet, with the moves worked out over the given number of worker processes.
+    If given, info is called with a message for every table generated. Returns the path of the table
+    """
+    material = normalize(material)
+    path = os.path.join(directory, material + ".xtb")
+    if os.path.exists(path):
+        return path
+    for child in submaterials(material):
+        generate(child, directory, workers, info)
+
+    start_time = time.perf_counter()
+    layout = TableLayout(material)
+    size = layout.get_size()
+    workers = workers or os.cpu_count() or 1
+
+    # work out the moves of every entry in chunks, a few per worker
+    chunk = max(1, -(-size // (4 * workers)))
+    bounds = [(start, min(start + chunk, size)) for start in range(0, size, chunk)]
+    valid = bytearray()
+    offsets = array("I", [0])
+    successors = array("I")
+    capture_win = array("H")
+    capture_loss = array("H")
+    capture_draw = bytearray()
+    with ProcessPoolExecutor(workers) as pool:
+        for part in pool.map(_solve_moves, [material] * len(bounds), [start for start, stop in bounds],
+                             [stop for start, stop in bounds], [directory] * len(bounds)):
+            part_valid, part_offsets, part_successors, part_win, part_loss, part_draw = part
+            base = len(successors)
+            valid += part_valid
+            offsets.extend(base + offset for offset in part_offsets[1:])
+            successors.extend(part_successors)
+            capture_win.extend(part_win)
+            capture_loss.extend(part_loss)
+            capture_draw += part_draw
+
+    entries = _retrograde(size, valid, offsets, successors, capture_win, capture_loss, capture_draw)
+    _write(path, material, entries)
+    if info is not None:
+        info(material + ": " + str(size) + " entries, " + str(sum(valid)) + " valid, "
+             + str(round(time.perf_counter() - start_time, 2)) + " s")
+    return path
+
+
+def _retrograde(size, valid, offsets, successors, capture_win, capture_loss, capture_draw):
+    """
+    Returns the entries of a table solved by retrograde analysis from the given moves of every entry. The results are
+    settled a distance at a time: a loss at one distance makes every predecessor a win at the next, and a predecessor
+    all of whose moves are wins for the opposing player is a loss one past the longest of them. Whatever is left is a
+    draw
+    """
+    # count the predecessors of every entry, then lay them out in one flat array
+    starts = array("I", [0]) * (size + 1)
+    for successor in successors:
+        starts[successor + 1] += 1
+    for index in range(size):
+        starts[index + 1] += starts[index]
+    predecessors = array("I", [0]) * len(successors)
+    filled = array("I", starts[:size])
+    for index in range(size):
+        for position in range(offsets[index], offsets[index + 1]):
+            successor = successors[position]
+            predecessors[filled[successor]] = index
+            filled[successor] += 1
+
+    # moves of every entry not yet known to be wins for the opposing player, and the longest of those that are
+    remaining = array("I", (offsets[index + 1] - offsets[index] for index in range(size)))
+    longest = array("H", capture_loss)
+
+    # start from the checkmates and stalemates, the entries a capture wins, and the entries whose every move is a
+    # capture that loses
+    pending = {}
+    for index in range(size):
+        if not valid[index]:
+            continue
+        if capture_win[index]:
+            pending.setdefault(capture_win[index], []).append(index)
+        elif remaining[index] == 0 and not capture_draw[index]:
+            pending.setdefault(longest[index], []).append(index)
+
+    entries = bytearray(size)
+    for index in range(size):
+        if valid[index]:
+            entries[index] = DRAW
+    settled = bytearray(size)
+    distance = 0
+    while pending:
+        for index in pending.pop(distance, []):
+            if settled[index]:
+                continue
+            if distance > MAX_DISTANCE:
+                raise ValueError("distance to the end of the game is too long to store")
+            settled[index] = 1
+            entries[index] = DISTANCE + distance
+
+            for position in range(starts[index], starts[index + 1]):
+                predecessor = predecessors[position]
+                if settled[predecessor]:
+                    continue
+
+                # a loss here is a win for every predecessor, one ply further
+                if distance % 2 == 0:
+                    pending.setdefault(distance + 1, []).append(predecessor)
+                    continue
+
+                # a win here takes one more move of the predecessor away from being anything but a loss, unless a
+                # capture already wins it
+                remaining[predecessor] -= 1
+                longest[predecessor] = max(longest[predecessor], distance + 1)
+                if remaining[predecessor] == 0 and not capture_draw[predecessor] and not capture_win[predecessor]:
+                    pending.setdefault(longest[predecessor], []).append(predecessor)
+        distance += 1
+    return entries
+
+
+def _write(path, material, entries):
+    """Writes the given entries of the table of the given material set to the given path, compressed in blocks"""
+    blocks = [zlib.compress(bytes(entries[start:start + BLOCK_SIZE]), 9)
+              for start in range(0, len(entries), BLOCK_SIZE)]
+    offset = len(MAGIC) + HEADER.size + 8 * (len(blocks) + 1)
+    offsets = []
+    for block in blocks:
+        offsets.append(offset)
+        offset += len(block)
+    offsets.append(offset)
+
+    # write to a temporary file first, so an interrupted run never leaves a partial table behind
+    with open(path + ".tmp", "wb") as table:
+        table.write(MAGIC)
+        table.write(HEADER.pack(material.encode(), len(entries), BLOCK_SIZE, len(blocks)))
+        table.write(struct.pack("<" + str(len(offsets)) + "Q", *offsets))
+        for block in blocks:
+            table.write(block)
+    os.replace(path + ".tmp", path)
+
+
+class Tablebase:
+    """
+    Represents a table file mapped into memory, with data members for the file, the memory map, the layout of its
+    material set, the entries per block, the offsets of the blocks and a cache of the blocks decompressed most recently
+    """
+    def __init__(self, path):
+        """Returns the table at the given path"""
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError("not a tablebase: " + path)
+        material, self._size, self._block_size, blocks = HEADER.unpack_from(self._map, len(MAGIC))
+        self._layout = TableLayout(material.rstrip(b"\x00").decode())
+        self._offsets = struct.unpack_from("<" + str(blocks + 1) + "Q", self._map, len(MAGIC) + HEADER.size)
+        self._blocks = {}
+
+    def __enter__(self):
+        """Returns the table itself for use in a with statement"""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Unmaps and closes the file at the end of a with statement"""
+        self.close()
+
+    def close(self):
+        """Unmaps and closes the file"""
+        self._map.close()
+        self._file.close()
+
+    def get_layout(self):
+        """Returns the TableLayout of the material set of the table"""
+        return self._layout
+
+    def get_entry(self, index):
+        """Returns the entry with the given index, decompressing its block if it is not cached"""
+        number = index // self._block_size
+        block = self._blocks.get(number)
+        if block is None:
+            if len(self._blocks) >= CACHED_BLOCKS:
+                del self._blocks[next(iter(self._blocks))]
+            block = zlib.decompress(self._map[self._offsets[number]:self._offsets[number + 1]])
+            self._blocks[number] = block
+        return block[index % self._block_size]
+
+    def probe(self, game):
+        """
+        Returns a ("win", "loss" or "draw", plies) pair for the player with turn in the given game, where plies is the
+        number of plies to the end of the game with best play, or None if the table does not cover the position
+        """
+        turn = RED if game.get_turn() == "red" else BLACK
+        index = self._layout.encode_board(game.board(), turn)
+        if index is None:
+            return None
+        return result_of(self.get_entry(index))
+
+
+def result_of(entry):
+    """Returns the ("win", "loss" or "draw", plies) pair of the given table entry, or None if the entry is invalid"""
+    if entry == INVALID:
+        return None
+    if entry == DRAW:
+        return "draw", None
+    distance = entry - DISTANCE
+    return ("win" if distance % 2 == 1 else "loss"), distance
+
+
+class TablebaseSet:
+    """
+    Represents the tables in a directory, with data members for the directory and the tables opened so far by material
+    set. Tables are opened the first time a position of their material set is probed
+    """
+    def __init__(self, directory):
+        """Returns the set of the tables in the given directory"""
+        self._directory = directory
+        self._tables = {}
+
+    def probe(self, game):
+        """
+        Returns a ("win", "loss" or "draw", plies) pair for the player with turn in the given game, or None if there is
+        no table for its material set or the table does not cover the position
+        """
+        try:
+            material = material_of(game.board())
+        except ValueError:
+            return None
+        if material not in self._tables:
+            path = os.path.join(self._directory, material + ".xtb")
+            self._tables[material] = Tablebase(path) if os.path.exists(path) else None
+        if self._tables[material] is None:
+            return None
+        return self._tables[material].probe(game)
+
+    def close(self):
+        """Closes every table opened"""
+        for table in self._tables.values():
+            if table is not None:
+                table.close()
+        self._tables = {}
+
+
+def main(arguments=None):
+    """Runs the tablebase command line interface with the given arguments, or the ones given to the program"""
+    parser = argparse.ArgumentParser(description="Generates and probes Xiangqi endgame tablebases.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("generate", help="generate the tables of material sets and the smaller ones they need")
+    build.add_argument("materials", nargs="+", help="material sets such as KR-KAA, red first")
+    build.add_argument("--directory", default=".", help="directory of the tables (default the current one)")
+    build.add_argument("--workers", type=int, default=None,
+                       help="number of worker processes (default one per processor)")
+    probe = commands.add_parser("probe", help="print the result of a position")
+    probe.add_argument("fen", help="FEN string of the position")
+    probe.add_argument("--directory", default=".", help="directory of the tables (default the current one)")
+    args = parser.parse_args(arguments)
+
+    if args.command == "generate":
+        os.makedirs(args.directory, exist_ok=True)
+        for material in args.materials:
+            generate(material, args.directory, args.workers, info=print)
+        return 0
+
+    from XiangqiGame import XiangqiGame
+    tables = TablebaseSet(args.directory)
+    result = tables.probe(XiangqiGame.from_fen(args.fen))
+    print(result if result is not None else "not in the tablebase")
+    tables.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
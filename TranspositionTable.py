@@ -0,0 +1,187 @@
+# Date: October 18, 2026
+# Description: Transposition table for searches over XiangqiGame positions. The TranspositionTable class stores the
+#              depth, bound type, score and best move searched for a position under its Zobrist key, within a fixed
+#              memory budget given in megabytes. Entries are packed into two preallocated arrays of 64-bit integers,
+#              one for the keys and one for the data, and grouped into buckets of two slots: a depth-preferred slot
+#              that keeps the deepest entry of the current search, and an always-replace slot that takes the rest.
+#              Entries left by earlier searches are aged out first, and hits, misses, collisions and overwrites are
+#              counted.
+
+from array import array
+
+# bound types of a stored score: the exact score, a lower bound from a cutoff, or an upper bound from failing low.
+# Zero is left for empty slots
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+# replacement policies of the first slot of each bucket
+DEPTH_PREFERRED = "depth"
+ALWAYS_REPLACE = "always"
+
+# bytes taken by one entry, a 64-bit key and 64 bits of data
+ENTRY_BYTES = 16
+SLOTS_PER_BUCKET = 2
+
+# layout of the data word: best move in bits 0-15, score in bits 16-37, depth in bits 38-45, bound in bits 46-47 and
+# the age of the search that stored it in bits 48-55. Scores are stored offset to be positive
+MOVE_BITS = 16
+SCORE_SHIFT = 16
+SCORE_OFFSET = 1 << 21
+SCORE_MASK = (1 << 22) - 1
+DEPTH_SHIFT = 38
+DEPTH_MASK = 255
+BOUND_SHIFT = 46
+BOUND_MASK = 3
+AGE_SHIFT = 48
+AGE_MASK = 255
+KEY_MASK = (1 << 64) - 1
+
+
+class TranspositionTable:
+    """
+    Represents a transposition table with data members for the number of buckets, the preallocated key and data arrays,
+    the replacement policy of the first slot of each bucket, the age of the current search, and the hit, miss,
+    collision, overwrite and store counts
+    """
+    def __init__(self, megabytes=16, policy=DEPTH_PREFERRED):
+        """
+        Returns an empty table using at most the given number of megabytes for its entries, with a power of two number
+        of buckets, and the given replacement policy for the first slot of each bucket
+        """
+        if policy not in (DEPTH_PREFERRED, ALWAYS_REPLACE):
+            raise ValueError("unknown replacement policy: " + str(policy))
+
+        buckets = 1
+        while buckets * 2 * SLOTS_PER_BUCKET * ENTRY_BYTES <= megabytes * 1024 * 1024:
+            buckets *= 2
+        self._buckets = buckets
+        self._mask = buckets - 1
+        self._keys = array("Q", [0]) * (buckets * SLOTS_PER_BUCKET)
+        self._data = array("Q", [0]) * (buckets * SLOTS_PER_BUCKET)
+        self._policy = policy
+        self._age = 0
+        self._hits = 0
+        self._misses = 0
+        self._collisions = 0
+        self._overwrites = 0
+        self._stores = 0
+
+    def get_size(self):
+        """Returns the number of entries the table holds"""
+        return self._buckets * SLOTS_PER_BUCKET
+
+    def get_bytes(self):
+        """Returns the number of bytes taken by the entries of the table"""
+        return self._keys.itemsize * len(self._keys) + self._data.itemsize * len(self._data)
+
+    def get_policy(self):
+        """Returns the replacement policy of the first slot of each bucket"""
+        return self._policy
+
+    def get_age(self):
+        """Returns the age of the current search"""
+        return self._age
+
+    def new_search(self):
+        """Starts a new search, so the entries of earlier searches are replaced first"""
+        self._age = (self._age + 1) & AGE_MASK
+
+    def clear(self):
+        """Empties the table and resets its statistics"""
+        self._keys = array("Q", [0]) * len(self._keys)
+        self._data = array("Q", [0]) * len(self._data)
+        self._age = 0
+        self.reset_stats()
+
+    def probe(self, key):
+        """
+        Returns the (depth, bound, score, move) stored for the given key, where move is a (from, to) pair of board
+        indexes or None, or returns None if the key is not stored
+        """
+        key &= KEY_MASK
+        slot = (key & self._mask) * SLOTS_PER_BUCKET
+        for index in (slot, slot + 1):
+            data = self._data[index]
+            if data and self._keys[index] == key:
+                self._hits += 1
+                return self._unpack(data)
+
+        # a miss on a bucket holding other positions is a collision
+        self._misses += 1
+        if self._data[slot] or self._data[slot + 1]:
+            self._collisions += 1
+        return None
+
+    def store(self, key, depth, bound, score, move=None):
+        """Stores the depth, bound type, score and best move, a (from, to) pair of board indexes or None, of the key"""
+        key &= KEY_MASK
+        slot = (key & self._mask) * SLOTS_PER_BUCKET
+        keys = self._keys
+        data = self._data
+
+        # replace the entry of the same position wherever it is, keeping its best move if none is given
+        if data[slot] and keys[slot] == key:
+            index = slot
+        elif data[slot + 1] and keys[slot + 1] == key:
+            index = slot + 1
+
+        # the first slot keeps the deepest entry of the current search, unless every entry replaces it
+        elif self._policy == ALWAYS_REPLACE or self._replaces(data[slot], depth):
+            index = slot
+        else:
+            index = slot + 1
+
+        if move is None and keys[index] == key and data[index]:
+            packed_move = data[index] & ((1 << MOVE_BITS) - 1)
+        else:
+            packed_move = 0 if move is None else (move[0] << 8) | move[1]
+        if data[index] and keys[index] != key:
+            self._overwrites += 1
+
+        keys[index] = key
+        data[index] = packed_move | ((score + SCORE_OFFSET) & SCORE_MASK) << SCORE_SHIFT \
+            | (min(max(depth, 0), DEPTH_MASK)) << DEPTH_SHIFT | bound << BOUND_SHIFT | self._age << AGE_SHIFT
+        self._stores += 1
+
+    def _replaces(self, data, depth):
+        """Returns True if an entry of the given depth replaces the given data in a depth-preferred slot"""
+        if not data:
+            return True
+        if (data >> AGE_SHIFT) & AGE_MASK != self._age:
+            return True
+        return depth >= (data >> DEPTH_SHIFT) & DEPTH_MASK
+
+    @staticmethod
+    def _unpack(data):
+        """Returns the (depth, bound, score, move) packed into the given data word"""
+        move = data & ((1 << MOVE_BITS) - 1)
+        return ((data >> DEPTH_SHIFT) & DEPTH_MASK, (data >> BOUND_SHIFT) & BOUND_MASK,
+                ((data >> SCORE_SHIFT) & SCORE_MASK) - SCORE_OFFSET, (move >> 8, move & 255) if move else None)
+
+    def get_usage(self):
+        """Returns the fraction of entries stored by the current search, sampled over the first thousand entries"""
+        sample = min(1000, len(self._data))
+        used = 0
+        for index in range(sample):
+            if self._data[index] and (self._data[index] >> AGE_SHIFT) & AGE_MASK == self._age:
+                used += 1
+        return used / sample
+
+    def get_stats(self):
+        """
+        Returns a dictionary of the hit, miss, collision, overwrite and store counts and the hit rate of the table. A
+        collision is a miss on a bucket holding other positions, and an overwrite is a store replacing another position
+        """
+        probes = self._hits + self._misses
+        return {"hits": self._hits, "misses": self._misses, "collisions": self._collisions,
+                "overwrites": self._overwrites, "stores": self._stores,
+                "hit_rate": self._hits / probes if probes else 0.0}
+
+    def reset_stats(self):
+        """Resets the hit, miss, collision, overwrite and store counts"""
+        self._hits = 0
+        self._misses = 0
+        self._collisions = 0
+        self._overwrites = 0
+        self._stores = 0
@@ -0,0 +1,417 @@
+# Date: October 18, 2026
+# Description: Search engine for the XiangqiGame program. The XiangqiEngine class searches the position of a game with
+#              negamax alpha-beta and a capture-only quiescence search, deepening iteratively until a depth, node or
+#              time budget runs out. It walks the game tree with the push_move and pop_move methods of the game, so the
+#              game is left as it was, and returns its best move in the algebraic form make_move takes together with
+#              the principal variation, the score, and the nodes searched. Given a TranspositionTable, the engine
+#              reuses the scores and best moves of positions it has already searched.
+
+import argparse
+import time
+
+from XiangqiGame import XiangqiGame, Rules, COLOR, RED, BLACK, TYPE_MASK, EMPTY, GENERAL, ADVISER, ELEPHANT, HORSE, \
+    CHARIOT, CANNON, SOLDIER, ROW, COLUMN, SIZE, SQUARES, parse_move, square_name
+from TranspositionTable import TranspositionTable, EXACT, LOWER, UPPER
+
+# material value of each piece type, with the general valued above everything else on the board combined
+PIECE_VALUES = {GENERAL: 10000, ADVISER: 20, ELEPHANT: 20, HORSE: 40, CHARIOT: 90, CANNON: 45, SOLDIER: 10}
+
+# mate scores are counted down by the number of moves to the mate, so that quicker mates score higher
+MATE = 100000
+INFINITY = 1000000
+
+# deepest ply searched, bounding the search while in check below the nominal depth
+MAX_PLY = 96
+
+
+def _square_bonus(piece_type, player, index):
+    """Returns the positional bonus of a piece of the given type and player on the given board index"""
+    row = ROW[index] if player == RED else 11 - ROW[index]
+    center = 4 - abs(COLUMN[index] - 5)
+
+    # soldiers double in value across the river, and more so close to the opposing castle
+    if piece_type == SOLDIER:
+        if row <= 5:
+            return 0
+        return 10 + 2 * center + (3 if 7 <= row <= 9 else 0)
+
+    # horses and cannons prefer the center files, and horses prefer to advance
+    if piece_type == HORSE:
+        return center + (row - 1) // 2
+    if piece_type == CANNON:
+        return center // 2 + (2 if COLUMN[index] == 5 else 0)
+
+    # chariots prefer to leave the back row
+    if piece_type == CHARIOT:
+        return 0 if row == 1 else 2
+    return 0
+
+
+# material and positional score of every piece code on every board index, positive for red and negative for black,
+# so the score of a position from red's point of view is the sum over its pieces
+PIECE_SQUARE = [[0] * SIZE for code in range((BLACK | TYPE_MASK) + 1)]
+for _piece_type, _value in PIECE_VALUES.items():
+    for _index in SQUARES:
+        PIECE_SQUARE[RED | _piece_type][_index] = _value + _square_bonus(_piece_type, RED, _index)
+        PIECE_SQUARE[BLACK | _piece_type][_index] = -_value - _square_bonus(_piece_type, BLACK, _index)
+del _piece_type, _value, _index
+
+
+def evaluate(board):
+    """Returns the material and positional score of the given board from red's point of view"""
+    score = 0
+    for index in SQUARES:
+        if board[index] != EMPTY:
+            score += PIECE_SQUARE[board[index]][index]
+    return score
+
+
+class SearchResult:
+    """
+    Represents the result of a search with the best move, its score from the point of view of the player with turn,
+    the principal variation, the depth completed, the nodes searched and the seconds it took
+    """
+    def __init__(self, move, score, pv, depth, nodes, elapsed):
+        """Returns a search result with the specified parameters"""
+        self._move = move
+        self._score = score
+        self._pv = pv
+        self._depth = depth
+        self._nodes = nodes
+        self._elapsed = elapsed
+
+    def __repr__(self):
+        """Sets up a summary line of the search result"""
+        return "depth " + str(self._depth) + " score " + str(self._score) + " nodes " + str(self._nodes) + \
+               " nps " + str(self.get_nps()) + " pv " + " ".join(from_square + to_square
+                                                                for from_square, to_square in self._pv)
+
+    def get_move(self):
+        """Returns the best move as a (from, to) pair of algebraically-notated locations, or None if there is none"""
+        return self._move
+
+    def get_score(self):
+        """Returns the score of the best move from the point of view of the player with turn"""
+        return self._score
+
+    def get_pv(self):
+        """Returns the principal variation as a list of (from, to) pairs of algebraically-notated locations"""
+        return self._pv
+
+    def get_depth(self):
+        """Returns the depth of the last completed iteration"""
+        return self._depth
+
+    def get_nodes(self):
+        """Returns the number of nodes searched"""
+        return self._nodes
+
+    def get_elapsed(self):
+        """Returns the seconds the search took"""
+        return self._elapsed
+
+    def get_nps(self):
+        """Returns the nodes searched per second"""
+        if self._elapsed <= 0:
+            return 0
+        return int(self._nodes / self._elapsed)
+
+
+class SearchStopped(Exception):
+    """Raised inside the search when its node or time budget runs out"""
+    pass
+
+
+class XiangqiEngine:
+    """
+    Represents a search engine over a XiangqiGame with data members for the game, the transposition table, the budgets
+    of the running search, the running score of the position and its earlier values, the nodes searched, the principal
+    variation and the killer moves per ply.
+    """
+    def __init__(self, game, table=None):
+        """Returns an engine searching the position of the given game, through the given TranspositionTable if any"""
+        self._game = game
+        self._board = game.board()
+        self._table = table
+        self._score = 0
+        self._scores = []
+        self._nodes = 0
+        self._node_limit = None
+        self._deadline = None
+        self._pv = []
+        self._killers = []
+
+    def search(self, max_depth=64, time_limit=None, node_limit=None, info=None):
+        """
+        Searches the position of the game with iterative deepening up to the given depth, stopping early when the given
+        number of seconds or nodes has been used up, and returns a SearchResult for the last completed iteration. If
+        given, info is called with the SearchResult of every completed iteration.
+        """
+        start = self._start(time_limit, node_limit)
+        if self._table is not None:
+            self._table.new_search()
+
+        result = SearchResult(None, 0, [], 0, 0, 0.0)
+        root_moves = self._legal_moves(0)
+        if self._game.get_game_state() != "UNFINISHED" or not root_moves:
+            return result
+
+        for depth in range(1, max_depth + 1):
+            try:
+                score, pv = self._search_root(root_moves, depth)
+            except SearchStopped:
+                break
+
+            # search the best move of this iteration first in the next one
+            root_moves.remove(pv[0])
+            root_moves.insert(0, pv[0])
+            self._pv = pv
+
+            moves = [(square_name(square_from), square_name(square_to)) for square_from, square_to in pv]
+            result = SearchResult(moves[0], score, moves, depth, self._nodes, time.perf_counter() - start)
+            if info is not None:
+                info(result)
+
+            # stop deepening once a mate has been found
+            if abs(score) >= MATE - MAX_PLY:
+                break
+
+        # the last iteration may have been stopped, so report every node searched
+        return SearchResult(result.get_move(), result.get_score(), result.get_pv(), result.get_depth(), self._nodes,
+                            time.perf_counter() - start)
+
+    def search_move(self, move, depth, alpha=-INFINITY, time_limit=None, node_limit=None):
+        """
+        Searches the given legal root move, a (from, to) pair of board indexes, to the given depth without deepening
+        iteratively, and returns a SearchResult, or None if the given number of seconds or nodes ran out first. The
+        score is exact if it is above the given alpha, and an upper bound at most alpha otherwise.
+        """
+        start = self._start(time_limit, node_limit)
+        self._make(move)
+        try:
+            score, pv = self._negamax(depth - 1, -INFINITY, -alpha, 1)
+        except SearchStopped:
+            return None
+        finally:
+            self._unmake()
+
+        moves = [(square_name(square_from), square_name(square_to)) for square_from, square_to in [move] + pv]
+        return SearchResult(moves[0], -score, moves, depth, self._nodes, time.perf_counter() - start)
+
+    def _start(self, time_limit, node_limit):
+        """Sets up the budgets, the running score, the killer moves and the principal variation of a new search"""
+        start = time.perf_counter()
+        self._nodes = 0
+        self._node_limit = node_limit
+        self._deadline = start + time_limit if time_limit is not None else None
+        self._score = evaluate(self._board)
+        self._killers = [[None, None] for ply in range(MAX_PLY + 1)]
+        self._pv = []
+        return start
+
+    def _search_root(self, root_moves, depth):
+        """Searches the given legal root moves to the given depth and returns the best score and principal variation"""
+        alpha = -INFINITY
+        best_pv = None
+        for move in root_moves:
+            self._make(move)
+            try:
+                score, pv = self._negamax(depth - 1, -INFINITY, -alpha, 1)
+            finally:
+                self._unmake()
+            score = -score
+            if best_pv is None or score > alpha:
+                alpha = score
+                best_pv = [move] + pv
+        return alpha, best_pv
+
+    def _negamax(self, depth, alpha, beta, ply):
+        """Returns the score of the position from the point of view of the player with turn, and its variation"""
+        self._count_node()
+        in_check = self._game.is_in_check(self._game.get_turn())
+
+        # keep searching while in check, so the quiescence search never stands pat on a check, up to the deepest ply
+        if (depth <= 0 and not in_check) or ply >= MAX_PLY:
+            return self._quiesce(alpha, beta, ply), []
+
+        # cut off on a stored score searched at least as deep, and otherwise search its best move first
+        table = self._table
+        hash_move = None
+        original_alpha = alpha
+        if table is not None and depth > 0:
+            entry = table.probe(self._game.get_key())
+            if entry is not None:
+                entry_depth, bound, score, hash_move = entry
+                if entry_depth >= depth:
+                    score = self._score_from_table(score, ply)
+                    if bound == EXACT or (bound == LOWER and score >= beta) or (bound == UPPER and score <= alpha):
+                        return score, []
+
+        moves = self._legal_moves(ply, hash_move=hash_move)
+        if not moves:
+            return -MATE + ply, []
+
+        best_pv = []
+        best = -INFINITY
+        for move in moves:
+            self._make(move)
+            try:
+                score, pv = self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                self._unmake()
+            score = -score
+            if score > best:
+                best = score
+                best_pv = [move] + pv
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self._add_killer(move, ply)
+                        break
+
+        if table is not None and depth > 0:
+            if best <= original_alpha:
+                bound = UPPER
+            elif best >= beta:
+                bound = LOWER
+            else:
+                bound = EXACT
+            table.store(self._game.get_key(), depth, bound, self._score_to_table(best, ply), best_pv[0])
+        return best, best_pv
+
+    @staticmethod
+    def _score_to_table(score, ply):
+        """Returns the given score with mate scores counted from the position instead of the root, for storing"""
+        if score >= MATE - MAX_PLY:
+            return score + ply
+        if score <= -MATE + MAX_PLY:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_table(score, ply):
+        """Returns the given stored score with mate scores counted from the root again"""
+        if score >= MATE - MAX_PLY:
+            return score - ply
+        if score <= -MATE + MAX_PLY:
+            return score + ply
+        return score
+
+    def _quiesce(self, alpha, beta, ply):
+        """Returns the score of the position searching only captures, standing pat on the static evaluation"""
+        stand_pat = self._score if self._game.get_turn() == "red" else -self._score
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        for move in self._legal_moves(ply, captures_only=True):
+            self._count_node()
+            self._make(move)
+            try:
+                score = -self._quiesce(-beta, -alpha, ply + 1)
+            finally:
+                self._unmake()
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        return alpha
+
+    def _legal_moves(self, ply, captures_only=False, hash_move=None):
+        """
+        Returns the legal moves of the player with turn as (from, to) board index pairs, ordered with the move of the
+        principal variation and the given best move from the transposition table first, then captures of the most
+        valuable pieces by the least valuable ones, then killers
+        """
+        board = self._board
+        game = self._game
+        player = COLOR[game.get_turn()]
+        in_check = game.is_in_check(game.get_turn())
+
+        pv_move = self._pv[ply] if ply < len(self._pv) else None
+        killers = self._killers[ply]
+        scored = []
+        for move in list(Rules.generate_moves(board, player)):
+            square_from, square_to = move
+            captured = board[square_to]
+            if captures_only and captured == EMPTY:
+                continue
+            if Rules.is_safe_move(board, player, square_from, square_to, in_check) is not True:
+                continue
+            if move == pv_move or move == hash_move:
+                order = 3 * INFINITY
+            elif captured != EMPTY:
+                order = 2 * INFINITY + 16 * PIECE_VALUES[captured & TYPE_MASK] \
+                    - PIECE_VALUES[board[square_from] & TYPE_MASK]
+            elif move in killers:
+                order = INFINITY
+            else:
+                order = 0
+            scored.append((order, move))
+
+        scored.sort(key=lambda entry: entry[0], reverse=True)
+        return [move for order, move in scored]
+
+    def _make(self, move):
+        """Makes the given move on the game and updates the running score"""
+        square_from, square_to = move
+        board = self._board
+        moved = board[square_from]
+        self._scores.append(self._score)
+        self._score += PIECE_SQUARE[moved][square_to] - PIECE_SQUARE[moved][square_from] \
+            - PIECE_SQUARE[board[square_to]][square_to]
+        self._game.push_move(square_from, square_to)
+
+    def _unmake(self):
+        """Takes back the last move made on the game and restores the running score"""
+        self._game.pop_move()
+        self._score = self._scores.pop()
+
+    def _add_killer(self, move, ply):
+        """Remembers a quiet move that caused a cutoff at the given ply"""
+        if self._board[move[1]] == EMPTY and self._killers[ply][0] != move:
+            self._killers[ply][1] = self._killers[ply][0]
+            self._killers[ply][0] = move
+
+    def _count_node(self):
+        """Counts a node and stops the search if its node or time budget has run out"""
+        self._nodes += 1
+        if self._nodes & 1023 == 0:
+            if self._node_limit is not None and self._nodes >= self._node_limit:
+                raise SearchStopped()
+            if self._deadline is not None and time.perf_counter() >= self._deadline:
+                raise SearchStopped()
+
+
+def main(arguments=None):
+    """Runs the engine command line interface with the given arguments, or the ones given to the program"""
+    parser = argparse.ArgumentParser(description="Searches a Xiangqi position for the best move.")
+    parser.add_argument("moves", nargs="*", help="moves to play from the starting position first, such as h3e3")
+    parser.add_argument("--depth", type=int, default=64, help="maximum depth to search to")
+    parser.add_argument("--time", type=float, default=None, help="seconds to search for")
+    parser.add_argument("--nodes", type=int, default=None, help="nodes to search")
+    parser.add_argument("--hash", type=int, default=16, metavar="MB",
+                        help="megabytes of transposition table, or 0 for none (default 16)")
+    args = parser.parse_args(arguments)
+
+    if args.time is None and args.nodes is None and args.depth == 64:
+        args.depth = 4
+
+    game = XiangqiGame()
+    for move in args.moves:
+        squares = parse_move(move)
+        if squares is None or not game.make_move(*squares):
+            print("illegal move:", move)
+            return 1
+
+    table = TranspositionTable(args.hash) if args.hash > 0 else None
+    result = XiangqiEngine(game, table).search(args.depth, args.time, args.nodes, info=print)
+    if table is not None:
+        print("hash", table.get_stats())
+    print("bestmove", "".join(result.get_move()) if result.get_move() is not None else "none")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
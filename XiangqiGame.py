@@ -5,122 +5,340 @@
 #              initialize a game board with piece objects on them, and is able to keep track of and execute making moves
 #              on the board according to appropriate rules and requirements of the game and the individual pieces.
 
+import random
+
+# piece encoding on the board: the low three bits hold the type of the piece and the next two bits the player
+EMPTY = 0
+GENERAL = 1
+ADVISER = 2
+ELEPHANT = 3
+HORSE = 4
+CHARIOT = 5
+CANNON = 6
+SOLDIER = 7
+TYPE_MASK = 7
+RED = 8
+BLACK = 16
+OFFBOARD = 32
+
+# translates between player names and player bits
+COLOR = {"red": RED, "black": BLACK}
+PLAYER = {RED: "red", BLACK: "black"}
+
+# the board is a flat mailbox of 10 rows and 9 columns, padded with a sentinel column on each side and two sentinel
+# rows on each end so that every step and jump of a piece from a playing square stays inside the array
+WIDTH = 11
+SIZE = 14 * WIDTH
+
+
+def square(row, column):
+    """Returns the index on the board of the given 1-based row and column"""
+    return (row + 1) * WIDTH + column
+
+
+# row and column of every index on the board, and the 90 playing squares in row-major order
+ROW = tuple(index // WIDTH - 1 for index in range(SIZE))
+COLUMN = tuple(index % WIDTH for index in range(SIZE))
+SQUARES = tuple(square(row, column) for row in range(1, 11) for column in range(1, 10))
+
+# (row, column) location of every board index, shared by the pieces of every game instead of a new tuple per move
+LOCATIONS = tuple((ROW[index], COLUMN[index]) for index in range(SIZE))
+
+# algebraic notation of every board index, shared by the legal moves of every game instead of new strings per move
+SQUARE_NAMES = tuple(chr(COLUMN[index] + 96) + str(ROW[index]) for index in range(SIZE))
+
+# castle squares of each player, where the generals and advisers are confined to
+PALACE = {
+    RED: tuple(square(row, column) for row in range(1, 4) for column in range(4, 7)),
+    BLACK: tuple(square(row, column) for row in range(8, 11) for column in range(4, 7)),
+}
+IN_PALACE = {RED: frozenset(PALACE[RED]), BLACK: frozenset(PALACE[BLACK])}
+
+# offsets of one orthogonal step, one diagonal step, an elephant move with the eye square it must not be blocked on, and
+# a horse move with the leg square it must not be blocked on
+ORTHOGONAL = (WIDTH, -WIDTH, 1, -1)
+DIAGONAL = (WIDTH + 1, WIDTH - 1, -WIDTH + 1, -WIDTH - 1)
+ELEPHANT_STEPS = tuple((2 * step, step) for step in DIAGONAL)
+HORSE_STEPS = (
+    (2 * WIDTH + 1, WIDTH), (2 * WIDTH - 1, WIDTH), (-2 * WIDTH + 1, -WIDTH), (-2 * WIDTH - 1, -WIDTH),
+    (WIDTH + 2, 1), (-WIDTH + 2, 1), (WIDTH - 2, -1), (-WIDTH - 2, -1),
+)
+
+# for each diagonal neighbor of an index, the offsets from the index of the horses whose leg is that neighbor
+HORSE_LEG_ATTACKERS = {step: tuple(-horse_step for horse_step, leg in HORSE_STEPS if leg - horse_step == step)
+                       for step in DIAGONAL}
+
+# offset of a forward step for the soldiers of each player, and the rows on each player's own side of the river
+FORWARD = {RED: WIDTH, BLACK: -WIDTH}
+OWN_SIDE = {RED: range(1, 6), BLACK: range(6, 11)}
+
+
+def _castle(index):
+    """Returns the castle squares the given board index is in, or no squares if it is outside of both castles"""
+    for castle in IN_PALACE.values():
+        if index in castle:
+            return castle
+    return frozenset()
+
+
+def _soldier_steps(index, player):
+    """Returns the board indexes a soldier of the given player on the given board index can step to"""
+    steps = [index + FORWARD[player]]
+    if ROW[index] not in OWN_SIDE[player]:
+        steps += [index - 1, index + 1]
+    return tuple(step for step in steps if step in ON_BOARD)
+
+
+# move tables built once for every board index. For generals and advisers, the squares one step away inside the same
+# castle; for elephants and horses, the squares one move away mapped to the eye or leg square that must be empty; and
+# for soldiers of each player, the squares one step forward, or also sideways across the river. Indexes outside of the
+# game board have no moves, so moves never need to be checked against the board bounds
+ON_BOARD = frozenset(SQUARES)
+GENERAL_MOVES = tuple(tuple(index + step for step in ORTHOGONAL if index + step in _castle(index))
+                      for index in range(SIZE))
+ADVISER_MOVES = tuple(tuple(index + step for step in DIAGONAL if index + step in _castle(index))
+                      for index in range(SIZE))
+ELEPHANT_MOVES = tuple({index + step: index + eye for step, eye in ELEPHANT_STEPS
+                        if index in ON_BOARD and index + step in ON_BOARD
+                        and (ROW[index] in OWN_SIDE[RED]) == (ROW[index + step] in OWN_SIDE[RED])}
+                       for index in range(SIZE))
+HORSE_MOVES = tuple({index + step: index + leg for step, leg in HORSE_STEPS
+                     if index in ON_BOARD and index + step in ON_BOARD}
+                    for index in range(SIZE))
+SOLDIER_MOVES = {player: tuple(_soldier_steps(index, player) if index in ON_BOARD else () for index in range(SIZE))
+                 for player in (RED, BLACK)}
+
+# the same tables reversed, for looking outward from an attacked square: the (from, eye) and (from, leg) pairs of the
+# elephants and horses that could move to each board index, and the squares soldiers of each player could step from
+ELEPHANT_ATTACKERS = tuple(tuple((index, eye) for index in SQUARES for target, eye in ELEPHANT_MOVES[index].items()
+                                 if target == attacked) for attacked in range(SIZE))
+HORSE_ATTACKERS = tuple(tuple((index, leg) for index in SQUARES for target, leg in HORSE_MOVES[index].items()
+                              if target == attacked) for attacked in range(SIZE))
+SOLDIER_ATTACKERS = {player: tuple(tuple(index for index in SQUARES if attacked in SOLDIER_MOVES[player][index])
+                                   for attacked in range(SIZE))
+                     for player in (RED, BLACK)}
+
+# random 64-bit numbers for every piece code on every board index and for black having the turn, XORed together into
+# the Zobrist key of a position; seeded so that keys stay the same across runs and can be stored. The numbers for an
+# empty square are zero so that a move XORs in its captured code without a branch
+_zobrist_random = random.Random(20200312)
+ZOBRIST = ((0,) * SIZE,) + tuple(tuple(_zobrist_random.getrandbits(64) for index in range(SIZE))
+                                 for code in range(1, OFFBOARD))
+ZOBRIST_BLACK = _zobrist_random.getrandbits(64)
+del _zobrist_random
+
+
+def parse_square(text):
+    """Returns the board index of an algebraically-notated location, or None if it is outside of the game board"""
+    row = int(text[1:])
+    column = ord(text[0]) - 96
+    if row < 1 or row > 10 or column < 1 or column > 9:
+        return None
+    return square(row, column)
+
+
+def parse_move(text):
+    """
+    Returns the algebraically-notated locations from and to of a move written as the two run together, such as "h3e3"
+    or "a10a9", or None if the text is not two locations on the game board
+    """
+    for split in (2, 3):
+        from_square, to_square = text[:split], text[split:]
+        if all(len(location) >= 2 and location[0].isalpha() and location[1:].isdecimal()
+               and parse_square(location) is not None for location in (from_square, to_square)):
+            return from_square, to_square
+    return None
+
+
+def square_name(index):
+    """Returns the algebraic notation of the given board index"""
+    return SQUARE_NAMES[index]
+
+
+def line_step(square_from, square_to):
+    """
+    Returns the orthogonal step leading from one board index towards the other along their row or column, or 0 if the
+    two do not share a row or column
+    """
+    if ROW[square_from] == ROW[square_to]:
+        return 1 if square_to > square_from else -1
+    if COLUMN[square_from] == COLUMN[square_to]:
+        return WIDTH if square_to > square_from else -WIDTH
+    return 0
+
+
+class MoveResult:
+    """
+    Represents the outcome of make_move with data members for the player who moved, the from and to board indexes of
+    the move, the code of the piece captured, whether the move put the opposing player in check, and the game state
+    after it. A result is true if the move was legal and made, and false otherwise, so it can be tested like the True
+    or False make_move used to return. Slots keep it to a single small object per move
+    """
+    __slots__ = ("_player", "_square_from", "_square_to", "_captured", "_check", "_game_state", "_self_check")
+
+    def __init__(self, player, square_from, square_to, captured, check, game_state, self_check=False):
+        """Returns a move result with specified parameters"""
+        self._player = player
+        self._square_from = square_from
+        self._square_to = square_to
+        self._captured = captured
+        self._check = check
+        self._game_state = game_state
+        self._self_check = self_check
+
+    def __bool__(self):
+        """Returns True if the move was legal and made"""
+        return self._player is not None
+
+    def __repr__(self):
+        """Sets up a summary string of the move result"""
+        if not self:
+            return "MoveResult(illegal" + (", self check)" if self._self_check else ")")
+        return "MoveResult(" + self._player + " " + "".join(self.get_move()) + (" captures" if self._captured else "") \
+            + (" check" if self._check else "") + ", " + self._game_state + ")"
+
+    def is_legal(self):
+        """Returns True if the move was legal and made"""
+        return self._player is not None
+
+    def get_player(self):
+        """Returns the player who made the move, or None if the move was illegal"""
+        return self._player
+
+    def get_move(self):
+        """Returns the (from, to) algebraically-notated locations of the move, or None if the move was illegal"""
+        if self._player is None:
+            return None
+        return square_name(self._square_from), square_name(self._square_to)
+
+    def get_captured(self):
+        """Returns the code of the piece captured by the move, or EMPTY if it captured nothing"""
+        return self._captured
+
+    def is_capture(self):
+        """Returns True if the move captured a piece"""
+        return self._captured != EMPTY
+
+    def is_check(self):
+        """Returns True if the move put the opposing player in check"""
+        return self._check
+
+    def is_checkmate(self):
+        """Returns True if the move put the opposing player in checkmate"""
+        return self._check and self._game_state not in (None, "UNFINISHED")
+
+    def is_stalemate(self):
+        """Returns True if the move left the opposing player in stalemate"""
+        return not self._check and self._game_state not in (None, "UNFINISHED")
+
+    def is_self_check(self):
+        """Returns True if the move was illegal only because it would leave the player's own general exposed"""
+        return self._self_check
+
+    def get_game_state(self):
+        """Returns the game state after the move, or None if the move was illegal"""
+        return self._game_state
+
+
+# shared results of illegal moves, so a rejected move allocates nothing: one for moves leaving the player's own general
+# exposed, and one for every other illegal move
+ILLEGAL = MoveResult(None, None, None, EMPTY, False, None)
+SELF_CHECK = MoveResult(None, None, None, EMPTY, False, None, True)
+
+# events a XiangqiGame notifies its subscribers of from make_move
+EVENTS = ("move", "illegal", "check", "checkmate", "stalemate")
+
+
+def print_messages(game, result):
+    """
+    Prints the messages of the given move result to the console, as make_move used to. Subscribe it to the "move" and
+    "illegal" events of a game to play it in the terminal
+    """
+    if result.is_self_check():
+        print("You put yourself in check, " + game.get_turn() + "!")
+    if not result:
+        return
+    opponent = "black" if result.get_player() == "red" else "red"
+    if result.is_check():
+        print("You are in check, " + opponent + "!")
+    if result.is_checkmate():
+        print("Checkmate! " + result.get_player().capitalize() + " wins!")
+    if result.is_stalemate():
+        print("You are stuck in a stalemate, " + opponent + "!")
+
+
+class GameSnapshot:
+    """
+    Represents a frozen copy of a game with data members for the piece codes of the game board, the undo records of
+    the moves made, the game state, the player with turn, the check statuses and the Zobrist key. It holds no piece
+    objects, so taking one copies a single bytes object and tuple, and any number of independent games can be made
+    from it with XiangqiGame.from_snapshot
+    """
+    __slots__ = ("_board", "_history", "_game_state", "_turn", "_red_check_status", "_black_check_status", "_key")
+
+    def __init__(self, board, history, game_state, turn, red_check_status, black_check_status, key):
+        """Returns a snapshot with specified parameters"""
+        self._board = board
+        self._history = history
+        self._game_state = game_state
+        self._turn = turn
+        self._red_check_status = red_check_status
+        self._black_check_status = black_check_status
+        self._key = key
+
+    def get_key(self):
+        """Returns the Zobrist key of the position"""
+        return self._key
+
+    def get_turn(self):
+        """Returns the player with turn"""
+        return self._turn
+
+    def get_game_state(self):
+        """Returns the game state"""
+        return self._game_state
+
+
 class XiangqiGame:
     """
     Represents a Xiangqi game with data members to initialize the game board, game pieces on the board in their starting
     positions, list of pieces on/off the board for each player, game state, turns, and check status for both players.
     Includes methods to print and get board, get and set game status, get and set turns, get and set check status, make
-    moves, and methods to evaluate valid moves, checks, checkmates and stalemates. 
+    moves, and methods to evaluate valid moves, checks, checkmates and stalemates.
     """
     def __init__(self):
         """
         Returns a game board with initial game pieces, list of pieces on/off the board, game status as unfinished,
         red player having initial turn, and with both players' check status as False.
         """
-
-        # creates a game board with algebraic notation labels for rows and columns
-        self._board = [
-            ['    a', ' b', ' c', ' d', ' e', ' f', ' g', ' h', ' i'],
-            ['1 ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  '],
-            ['2 ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  '],
-            ['3 ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  '],
-            ['4 ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  '],
-            ['5 ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  '],
-            ['6 ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  '],
-            ['7 ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  '],
-            ['8 ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  '],
-            ['9 ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  '],
-            ['10', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ', '  ']
-        ]
+        self._clear()
 
         # creates object instances of individual piece classes and place them on the game board for both players
         # with piece data members holding its type, location and player it belongs to
-        rc1 = Chariot(Chariot, (1, 1), "red")
-        self._board[1][1] = rc1
-
-        rh1 = Horse(Horse, (1, 2), "red")
-        self._board[1][2] = rh1
-
-        re1 = Elephant(Elephant, (1, 3), "red")
-        self._board[1][3] = re1
-
-        ra1 = Adviser(Adviser, (1, 4), "red")
-        self._board[1][4] = ra1
-
-        rg = General(General, (1, 5), "red")
-        self._board[1][5] = rg
-
-        ra2 = Adviser(Adviser, (1, 6), "red")
-        self._board[1][6] = ra2
-
-        re2 = Elephant(Elephant, (1, 7), "red")
-        self._board[1][7] = re2
-
-        rh2 = Horse(Horse, (1, 8), "red")
-        self._board[1][8] = rh2
-
-        rc2 = Chariot(Chariot, (1, 9), "red")
-        self._board[1][9] = rc2
-
-        rn1 = Cannon(Cannon, (3, 2), "red")
-        self._board[3][2] = rn1
-
-        rn2 = Cannon(Cannon, (3, 8), "red")
-        self._board[3][8] = rn2
-
-        rs1 = Solider(Solider, (4, 1), "red")
-        rs2 = Solider(Solider, (4, 3), "red")
-        rs3 = Solider(Solider, (4, 5), "red")
-        rs4 = Solider(Solider, (4, 7), "red")
-        rs5 = Solider(Solider, (4, 9), "red")
-
-        self._board[4][1] = rs1
-        self._board[4][3] = rs2
-        self._board[4][5] = rs3
-        self._board[4][7] = rs4
-        self._board[4][9] = rs5
-
-        bs1 = Solider(Solider, (7, 1), "black")
-        bs2 = Solider(Solider, (7, 3), "black")
-        bs3 = Solider(Solider, (7, 5), "black")
-        bs4 = Solider(Solider, (7, 7), "black")
-        bs5 = Solider(Solider, (7, 9), "black")
-
-        self._board[7][1] = bs1
-        self._board[7][3] = bs2
-        self._board[7][5] = bs3
-        self._board[7][7] = bs4
-        self._board[7][9] = bs5
-
-        bn1 = Cannon(Cannon, (8, 2), "black")
-        bn2 = Cannon(Cannon, (8, 8), "black")
-
-        self._board[8][2] = bn1
-        self._board[8][8] = bn2
-
-        bc1 = Chariot(Chariot, (10, 1), "black")
-        bh1 = Horse(Horse, (10, 2), "black")
-        be1 = Elephant(Elephant, (10, 3), "black")
-        ba1 = Adviser(Adviser, (10, 4), "black")
-        bg = General(General, (10, 5), "black")
-        ba2 = Adviser(Adviser, (10, 6), "black")
-        be2 = Elephant(Elephant, (10, 7), "black")
-        bh2 = Horse(Horse, (10, 8), "black")
-        bc2 = Chariot(Chariot, (10, 9), "black")
-
-        self._board[10][1] = bc1
-        self._board[10][2] = bh1
-        self._board[10][3] = be1
-        self._board[10][4] = ba1
-        self._board[10][5] = bg
-        self._board[10][6] = ba2
-        self._board[10][7] = be2
-        self._board[10][8] = bh2
-        self._board[10][9] = bc2
+        for piece_type, row, column in INITIAL_LAYOUT:
+            self._place(piece_type(piece_type, LOCATIONS[square(row, column)], "red"))
+        for piece_type, row, column in INITIAL_LAYOUT:
+            self._place(piece_type(piece_type, LOCATIONS[square(11 - row, column)], "black"))
+
+        # Zobrist key of the position, kept up to date by every move made
+        self._key = Rules.compute_key(self._board, RED)
+
+    def _clear(self):
+        """
+        Sets up an empty game board with no pieces on or off it, game status as unfinished, red player having the turn,
+        and both players' check status as False
+        """
+
+        # creates a game board of piece codes with every square outside of the playing area holding the sentinel,
+        # and a parallel list holding the piece object on each square
+        self._board = bytearray([OFFBOARD]) * SIZE
+        for index in SQUARES:
+            self._board[index] = EMPTY
+        self._pieces = [None] * SIZE
 
         # initialize list for pieces on and off the board to keep track of pieces accordingly
-        self._red_on_board = [rc1, rh1, re1, ra1, rg, ra2, re2, rh2, rc2, rn1, rn2, rs1, rs2, rs3, rs4, rs5]
-        self._black_on_board = [bc1, bh1, be1, ba1, bg, ba2, be2, bh2, bc2, bn1, bn2, bs1, bs2, bs3, bs4, bs5]
+        self._red_on_board = []
+        self._black_on_board = []
         self._red_removed = []
         self._black_removed = []
 
@@ -130,17 +348,44 @@ class XiangqiGame:
         self._red_check_status = False
         self._black_check_status = False
 
+        # undo records of the moves made so far, most recent last
+        self._history = []
+
+        # Zobrist key of the position, kept up to date by every move made
+        self._key = 0
+
+        # legal moves of the position, memoized together with the key and game state they were generated for
+        self._legal_moves_for = None
+        self._legal_moves = ()
+        self._legal_moves_by_square = None
+
+        # callbacks subscribed to the events of make_move, by event
+        self._observers = {}
+
+    def _place(self, piece):
+        """
+        Places the given piece object on the game board at its location and adds it to the list of its player, keeping
+        its slot index in the list on the piece
+        """
+        index = square(*piece.get_location())
+        self._board[index] = piece.get_code()
+        self._pieces[index] = piece
+        if piece.get_player() == "red":
+            piece._index = len(self._red_on_board)
+            self._red_on_board.append(piece)
+        else:
+            piece._index = len(self._black_on_board)
+            self._black_on_board.append(piece)
+
     def get_board(self):
         """Prints the game board"""
-        print(' '.join(self._board[0]))
-        for i in range(1, 6):
-            for j in range(len(self._board[i])):
-                print(self._board[i][j], end=" ")
-            print()
-        print("\033[1;34m|||||||||||||||||||||||||||||\033[0m")
-        for j in range(6, 11):
-            for k in range(len(self._board[j])):
-                print(self._board[j][k], end=" ")
+        print(' '.join(['    a', ' b', ' c', ' d', ' e', ' f', ' g', ' h', ' i']))
+        for row in range(1, 11):
+            if row == 6:
+                print("\033[1;34m|||||||||||||||||||||||||||||\033[0m")
+            print(str(row).ljust(2), end=" ")
+            for column in range(1, 10):
+                print(NAMES[self._board[square(row, column)]], end=" ")
             print()
 
     def board(self):
@@ -161,8 +406,198 @@ class XiangqiGame:
 
     def set_turn(self, player):
         """Sets the turn for player as given parameter"""
+        if player != self._turn:
+            self._key ^= ZOBRIST_BLACK
         self._turn = player
 
+    def get_key(self):
+        """Returns the 64-bit Zobrist key of the position, covering the pieces on the board and the player with turn"""
+        return self._key
+
+    def get_squares(self):
+        """Returns the piece codes on the 90 playing squares of the board in row-major order from a1 to i10, as bytes"""
+        return bytes(self._board[index] for index in SQUARES)
+
+    @classmethod
+    def from_squares(cls, codes, turn="red"):
+        """
+        Returns an unfinished game with the given piece codes on the 90 playing squares in row-major order, as returned
+        by get_squares, and the given player with turn. The check statuses are evaluated from the board.
+        """
+        if len(codes) != len(SQUARES) or turn not in COLOR:
+            raise ValueError("expected 90 piece codes and a player with turn")
+
+        # place a piece object on an empty board for every code given
+        game = cls.__new__(cls)
+        game._clear()
+        for index, code in zip(SQUARES, codes):
+            if code != EMPTY:
+                if code not in NAMES:
+                    raise ValueError("invalid piece code: " + str(code))
+                piece_type = PIECE_TYPES[code & TYPE_MASK]
+                game._place(piece_type(piece_type, LOCATIONS[index], PLAYER[code & (RED | BLACK)]))
+        game._set_up_turn(turn)
+        return game
+
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        Returns an unfinished game in the position of the given Xiangqi FEN string, such as the starting position
+        "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1", with red pieces in upper case listed
+        from black's side of the board. The pieces are placed in a single pass over the string, and the move counters
+        are not kept. The check statuses are evaluated from the board.
+        """
+        fields = fen.split()
+        if not fields or (len(fields) > 1 and fields[1] not in FEN_TURNS):
+            raise ValueError("invalid FEN: " + fen)
+
+        # walk the rows from black's side, placing a piece object for every letter and skipping a square per digit
+        game = cls.__new__(cls)
+        game._clear()
+        row = 10
+        column = 1
+        for char in fields[0]:
+            if char == "/":
+                if column != 10 or row == 1:
+                    raise ValueError("invalid FEN: " + fen)
+                row -= 1
+                column = 1
+            elif char in "123456789":
+                column += int(char)
+            elif char in FEN_CODES and column <= 9:
+                code = FEN_CODES[char]
+                piece_type = PIECE_TYPES[code & TYPE_MASK]
+                game._place(piece_type(piece_type, LOCATIONS[square(row, column)], PLAYER[code & (RED | BLACK)]))
+                column += 1
+            else:
+                raise ValueError("invalid FEN: " + fen)
+        if row != 1 or column != 10:
+            raise ValueError("invalid FEN: " + fen)
+
+        game._set_up_turn(FEN_TURNS[fields[1]] if len(fields) > 1 else "red")
+        return game
+
+    def to_fen(self):
+        """
+        Returns the Xiangqi FEN string of the position, with the number of moves made on the game as the move number
+        """
+        rows = []
+        for row in range(10, 0, -1):
+            text = ""
+            empty = 0
+            for column in range(1, 10):
+                code = self._board[square(row, column)]
+                if code == EMPTY:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += FEN_LETTERS[code]
+            if empty:
+                text += str(empty)
+            rows.append(text)
+        turn = "w" if self._turn == "red" else "b"
+        return "/".join(rows) + " " + turn + " - - 0 " + str(len(self._history) // 2 + 1)
+
+    def snapshot(self):
+        """
+        Returns a GameSnapshot of the game, from which independent games can be made later without the game being
+        affected by them or they by any move made on the game afterwards
+        """
+        return GameSnapshot(bytes(self._board), tuple(self._history), self._game_state, self._turn,
+                            self._red_check_status, self._black_check_status, self._key)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """
+        Returns a new game in the position and state of the given GameSnapshot, with its moves made, so they can be
+        taken back with pop_move. The new game has no subscribers
+        """
+        game = cls.__new__(cls)
+        game._restore(snapshot._board, snapshot._history, snapshot._game_state, snapshot._turn,
+                      snapshot._red_check_status, snapshot._black_check_status, snapshot._key)
+        return game
+
+    def clone(self):
+        """
+        Returns an independent copy of the game, with its moves made, so what-if lines can be played and taken back on
+        the copy without touching the game. The legal moves already generated for the position are shared, and the copy
+        has no subscribers
+        """
+        game = self.__class__.__new__(self.__class__)
+        game._restore(self._board, self._history, self._game_state, self._turn, self._red_check_status,
+                      self._black_check_status, self._key)
+        game._legal_moves_for = self._legal_moves_for
+        game._legal_moves = self._legal_moves
+        game._legal_moves_by_square = self._legal_moves_by_square
+        return game
+
+    def _restore(self, board, history, game_state, turn, red_check_status, black_check_status, key):
+        """
+        Sets the game up from the given piece codes of the game board, undo records and state, making a piece object for
+        every code on the board and for every piece captured in the undo records
+        """
+        self._clear()
+        self._board[:] = board
+        self._history = list(history)
+        self._game_state = game_state
+        self._turn = turn
+        self._red_check_status = red_check_status
+        self._black_check_status = black_check_status
+        self._key = key
+
+        # place a piece object on every square holding a code, straight into the lists of pieces on the board
+        pieces = self._pieces
+        on_board = {RED: self._red_on_board, BLACK: self._black_on_board}
+        for index in SQUARES:
+            code = board[index]
+            if code != EMPTY:
+                piece_type = PIECE_TYPES[code & TYPE_MASK]
+                piece = piece_type(piece_type, LOCATIONS[index], PLAYER[code & (RED | BLACK)])
+                player_pieces = on_board[code & (RED | BLACK)]
+                piece._index = len(player_pieces)
+                player_pieces.append(piece)
+                pieces[index] = piece
+
+        # captured pieces go on the removed lists in the order they were taken, so pop_move gives them back in turn.
+        # Their slot index only needs to be within the list of pieces on the board when they are put back
+        for square_from, square_to, captured, *rest in history:
+            if captured != EMPTY:
+                piece_type = PIECE_TYPES[captured & TYPE_MASK]
+                piece = piece_type(piece_type, LOCATIONS[square_to], PLAYER[captured & (RED | BLACK)])
+                piece._index = 0
+                (self._red_removed if captured & RED else self._black_removed).append(piece)
+
+    def _set_up_turn(self, turn):
+        """Sets the turn of a game set up from a position, evaluating the check statuses and key from the board"""
+        self._turn = turn
+        self._red_check_status = Rules.is_in_check(self._board, RED)
+        self._black_check_status = Rules.is_in_check(self._board, BLACK)
+        self._key = Rules.compute_key(self._board, COLOR[turn])
+
+    def legal_moves(self, square=None):
+        """
+        Returns a tuple of the (from, to) algebraically-notated legal moves of the player with turn, or only those of
+        the piece on the given algebraically-notated location. The moves are generated once per position and game
+        state, so repeated queries are answered from the memo until a move is made. The moves are grouped by piece only
+        once the moves of a piece are asked for.
+        """
+        if self._legal_moves_for != (self._key, self._game_state):
+            self._legal_moves = tuple((SQUARE_NAMES[square_from], SQUARE_NAMES[square_to]) for square_from, square_to
+                                      in Rules.generate_legal_moves(self._board, COLOR[self._turn], self._game_state))
+            self._legal_moves_by_square = None
+            self._legal_moves_for = (self._key, self._game_state)
+
+        if square is None:
+            return self._legal_moves
+        if self._legal_moves_by_square is None:
+            by_square = {}
+            for move in self._legal_moves:
+                by_square.setdefault(move[0], []).append(move)
+            self._legal_moves_by_square = {name: tuple(piece_moves) for name, piece_moves in by_square.items()}
+        return self._legal_moves_by_square.get(square, ())
+
     def is_in_check(self, player):
         """Returns if given player is in check"""
         if player == 'red':
@@ -178,811 +613,440 @@ class XiangqiGame:
             self._black_check_status = status
 
     def make_move(self, from_square, to_square):
-        """Makes move with given algebraically-notated from and to locations on the board"""
-
-        # translates given parameter for location of the piece to be moved
-        row_from = int(from_square[1:])
-        column_from = int(ord(from_square[0]) - 96)
-        from_piece = self.board()[row_from][column_from]
-
-        # translates given parameter for location of the board for the piece to be moved to
-        row_to = int(to_square[1:])
-        column_to = int(ord(to_square[0]) - 96)
-        to_piece = self.board()[row_to][column_to]
-
-        # if the location of the piece that needs to be moved is empty, return False
-        if self.board()[row_from][column_from] == '  ':
-            return False
-
-        # if the piece to be moved does not belong to the player with turn, return False
-        if self.get_turn() != self.board()[row_from][column_from].get_player():
-            return False
-
-        # call the checker function in the Piece class to check for rules for all pieces and individual pieces
-        if Piece().checker(self._board, row_from, column_from, row_to, column_to) is True:
-
-            # if the move is allowed, and the destination has a game piece, remove the piece from the list of pieces of
-            # respective player and add to the list of removed pieces for the player
-            if self.board()[row_to][column_to] != '  ':
-                if self.get_turn() == "red":
-                    self._black_on_board.remove(self.board()[row_to][column_to])
-                    self._black_removed.append(self.board()[row_to][column_to])
-
-                if self.get_turn() == "black":
-                    self._red_on_board.remove(self.board()[row_to][column_to])
-                    self._red_removed.append(self.board()[row_to][column_to])
-
-            # place piece in the destination square
-            self.board()[row_to][column_to] = self.board()[row_from][column_from]
-
-            # empty the moved piece's former location
-            self.board()[row_from][column_from] = '  '
-
-            # set the moved piece's location accordingly
-            self.board()[row_to][column_to].set_location((row_to, column_to))
-
-            # calls check_in_check method to check if the move is allowed
-            if self.check_in_check() is True:
-
-                # if the move is allowed, check if the move puts the opposing player in check
-                if self.check_put_in_check() is True:
-
-                    # if the opposing player is in check, say so
-                    if self.get_turn() == "red":
-                        print("You are in check, black!")
-                        self.set_is_in_check("black", True)
-                    if self.get_turn() == "black":
-                        print("You are in check, red!")
-                        self.set_is_in_check("red", True)
-
-                    # check if the opposing player is in checkmate
-                    if self.check_or_stale() is True:
-                        if self.get_turn() == "red":
-                            print("Checkmate! Red wins!")
-                        if self.get_turn() == "black":
-                            print("Checkmate! Black wins!")
-                        return True
-
-                    return True
-
-                # if the move does not put the opposing player in check, reset check status for players
-                else:
-                    if self.get_turn() == "black":
-                        self.set_is_in_check("black", False)
-                    if self.get_turn() == "red":
-                        self.set_is_in_check("red", False)
-
-                    # check if the opposing player is in stalemate
-                    if self.check_or_stale() is True:
-                        if self.get_turn() == "red":
-                            print("You are stuck in a stalemate, black!")
-                        if self.get_turn() == "black":
-                            print("You are stuck in a stalemate, red!")
-                        return True
-                    return True
+        """
+        Makes move with given algebraically-notated from and to locations on the board. Returns a MoveResult, which is
+        true if the move was legal and made, and notifies the subscribers of the game's events of it
+        """
 
-            # if the move is not allowed, say so, and reverse the move
+        # translates given parameters for locations of the piece to be moved and of its destination
+        square_from = parse_square(from_square)
+        square_to = parse_square(to_square)
+        if square_from is None or square_to is None:
+            return self._notify("illegal", ILLEGAL)
+
+        # ask the rules kernel whether the move is legal for the player with turn in the current game state, letting it
+        # know whether the player is in check
+        player = COLOR[self.get_turn()]
+        if Rules.is_legal_move(self._board, player, self.get_game_state(), square_from, square_to,
+                               self.is_in_check(self.get_turn())) is not True:
+
+            # if the move only fails because it leaves the player's own general exposed, say so
+            if self._board[square_from] & player:
+                if Piece.checker(self._board, square_from, square_to, self.get_game_state()) is True:
+                    return self._notify("illegal", SELF_CHECK)
+            return self._notify("illegal", ILLEGAL)
+
+        # make the move, which also passes the turn to the opposing player and updates the check statuses
+        captured = self._board[square_to]
+        self.push_move(square_from, square_to)
+
+        # check if the move puts the opposing player in check, and if the opposing player is in checkmate or stalemate
+        check = self.check_put_in_check()
+        self.check_or_stale()
+        result = MoveResult(PLAYER[player], square_from, square_to, captured, check, self.get_game_state())
+
+        # tell the subscribers, if there are any, about the move and what it led to
+        if self._observers:
+            self._notify("move", result)
+            if result.is_check():
+                self._notify("check", result)
+            if result.is_checkmate():
+                self._notify("checkmate", result)
+            if result.is_stalemate():
+                self._notify("stalemate", result)
+        return result
+
+    def subscribe(self, event, callback):
+        """
+        Registers the given callback to be called with the game and the MoveResult whenever the given event, one of
+        EVENTS, happens in make_move. With nothing subscribed, make_move does no work for events at all
+        """
+        if event not in EVENTS:
+            raise ValueError("unknown event: " + str(event))
+        self._observers.setdefault(event, []).append(callback)
+
+    def unsubscribe(self, event, callback):
+        """Removes the given callback from the subscribers of the given event"""
+        callbacks = self._observers.get(event, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+            if not callbacks:
+                del self._observers[event]
+
+    def _notify(self, event, result):
+        """Calls the subscribers of the given event with the game and the given result, and returns the result"""
+        if self._observers:
+            for callback in self._observers.get(event, ()):
+                callback(self, result)
+        return result
+
+    def push_move(self, square_from, square_to):
+        """
+        Moves the piece on the given board index to the given board index without validating the move, and passes the
+        turn to the opposing player. Records what is needed to take the move back with pop_move on the undo stack, so a
+        search can walk the game tree without copying the game. Captures are kept track of in constant time. The move is
+        expected to be legal: the player making it is taken out of check, and the opposing player is put in check only
+        if the move opens or makes an attack on their general.
+        """
+        board = self._board
+        pieces = self._pieces
+        captured = board[square_to]
+
+        moved = board[square_from]
+
+        # record the move, the captured code, and the turn, game state, check statuses and key before the move
+        self._history.append((square_from, square_to, captured, self._turn, self._game_state,
+                              self._red_check_status, self._black_check_status, self._key))
+
+        # update the key for the moved piece, the captured piece and the turn passing
+        self._key ^= ZOBRIST[moved][square_from] ^ ZOBRIST[moved][square_to] ^ ZOBRIST[captured][square_to] \
+            ^ ZOBRIST_BLACK
+
+        # if the destination has a game piece, swap it out of its player's list of pieces on the board by its slot
+        # index and add it to the list of removed pieces for the player
+        if captured != EMPTY:
+            to_piece = pieces[square_to]
+            if captured & RED:
+                on_board, removed = self._red_on_board, self._red_removed
             else:
-                if self.get_turn() == "red":
-                    print("You put yourself in check, red!")
-                if self.get_turn() == "black":
-                    print("You put yourself in check, black!")
-
-                # reverse the placement of pieces
-                self.board()[row_from][column_from] = from_piece
-                self.board()[row_to][column_to] = to_piece
-
-                # reinstate lists of pieces for either player
-                if to_piece != '  ':
-                    if self.get_turn() == "red":
-                        self._black_on_board.append(to_piece)
-                        self._black_removed.remove(to_piece)
-                    if self.get_turn() == "black":
-                        self._red_on_board.append(to_piece)
-                        self._red_removed.remove(to_piece)
-
-                # reset location of moved piece
-                self.board()[row_from][column_from].set_location((row_from, column_from))
+                on_board, removed = self._black_on_board, self._black_removed
+            last = on_board.pop()
+            if last is not to_piece:
+                on_board[to_piece._index] = last
+                last._index = to_piece._index
+            removed.append(to_piece)
+
+        # place piece in the destination square, empty its former location and set its location accordingly
+        board[square_to] = moved
+        board[square_from] = EMPTY
+        pieces[square_to] = pieces[square_from]
+        pieces[square_from] = None
+        pieces[square_to].set_location(LOCATIONS[square_to])
+
+        self._turn = PLAYER[moved & (RED | BLACK) ^ (RED | BLACK)]
+
+        # update the check statuses by looking only at the lines through the two squares of the move
+        if moved & RED:
+            self._red_check_status = False
+            self._black_check_status = Rules.gives_check(board, square_from, square_to)
+        else:
+            self._black_check_status = False
+            self._red_check_status = Rules.gives_check(board, square_from, square_to)
+
+    def pop_move(self):
+        """Takes back the last move made by push_move or make_move, restoring the game exactly as it was before it"""
+        square_from, square_to, captured, turn, game_state, red_check, black_check, key = self._history.pop()
+        board = self._board
+        pieces = self._pieces
+
+        # move the piece back to its former location
+        board[square_from] = board[square_to]
+        pieces[square_from] = pieces[square_to]
+        pieces[square_from].set_location(LOCATIONS[square_from])
+        board[square_to] = captured
+
+        # if the move was a capture, put the captured piece back into its slot in its player's list of pieces on the
+        # board, moving the piece that took over the slot back to the end of the list
+        if captured != EMPTY:
+            if captured & RED:
+                on_board, removed = self._red_on_board, self._red_removed
+            else:
+                on_board, removed = self._black_on_board, self._black_removed
+            to_piece = removed.pop()
+            if to_piece._index < len(on_board):
+                last = on_board[to_piece._index]
+                last._index = len(on_board)
+                on_board.append(last)
+                on_board[to_piece._index] = to_piece
+            else:
+                on_board.append(to_piece)
+            pieces[square_to] = to_piece
+        else:
+            pieces[square_to] = None
 
-            return False
-        return False
+        self._turn = turn
+        self._game_state = game_state
+        self._red_check_status = red_check
+        self._black_check_status = black_check
+        self._key = key
 
     def check_in_check(self):
         """
-        Checks if the move is allowed by checking whether the move puts the player making the move in check,
-        including the flying general situation. If the move is allowed, return True. Return False otherwise.
+        Checks if the last move is allowed by checking whether it put the player who made it in check, including the
+        flying general situation. If the move is allowed, return True. Return False otherwise.
         """
-
-        # if red player made the move, iterate over corresponding rows/columns to find red's general's location
-        if self.get_turn() == "red":
-            target = None
-            for row in range(1, 4):
-                for column in range(4, 7):
-                    if self.board()[row][column] != '  ' and self.board()[row][column].get_piece_type() == General:
-                        # target variable holds red's general's location
-                        target = (row, column)
-
-            # iterate over the pieces belonging to black player that is on the game board to check if any can
-            # capture red's general
-            poss_moves = []
-            for piece in self._black_on_board:
-                row_from = piece.get_location()[0]
-                column_from = piece.get_location()[1]
-
-                # store all possible moves by the black pieces on the game board into the list
-                for row in range(1, 11):
-                    for column in range(1, 10):
-                        if Piece().checker(self._board, row_from, column_from, row, column) is True:
-                            poss_moves.append((row, column))
-
-            # if the red's general can be captured, say so, and return False to disallow red from making an illegal move
-            if target in poss_moves:
-                return False
-
-            # iterate over corresponding rows/columns to find black's general's location
-            black_general = None
-            for row in range(8, 11):
-                for column in range(4, 7):
-                    # black_general holds black general's location
-                    if self.board()[row][column] != '  ' and self.board()[row][column].get_piece_type() == General:
-                        black_general = (row, column)
-
-            # iterate over game board locations between two generals to see if all of the intervening spaces are empty
-            if target[1] == black_general[1]:
-                x = abs(target[0] - black_general[0])
-                empty_squares = 0
-                for i in range(1, x):
-                    if self.board()[black_general[0] - i][target[1]] == '  ':
-                        empty_squares += 1
-
-                # if all intervening squares are empty, return False to disallow red from making an illegal move
-                if empty_squares == x - 1:
-                    return False
-
-            # if move is allowed, return True
-            return True
-
-        # if black player made the move, iterate over corresponding rows/columns to find black's general's location
-        if self.get_turn() == "black":
-            target = None
-            for row in range(8, 11):
-                for column in range(4, 7):
-                    if self.board()[row][column] != '  ' and self.board()[row][column].get_piece_type() == General:
-                        # target variable holds black general's location
-                        target = (row, column)
-
-            # iterate over the pieces belonging to red player that is on the game board to check if any can
-            # capture black's general
-            poss_moves = []
-            for piece in self._red_on_board:
-                row_from = piece.get_location()[0]
-                column_from = piece.get_location()[1]
-
-                # store all possible moves by the red pieces on the game board into the list
-                for row in range(1, 11):
-                    for column in range(1, 10):
-                        if Piece().checker(self._board, row_from, column_from, row, column) is True:
-                            poss_moves.append((row, column))
-
-            # if the black's general can be captured, say so and return False to disallow black from making illegal move
-            if target in poss_moves:
-                return False
-
-            # iterate over corresponding rows/columns to find red general's location
-            red_general = None
-            for row in range(1, 4):
-                for column in range(4, 7):
-                    if self.board()[row][column] != '  ' and self.board()[row][column].get_piece_type() == General:
-                        # red_general holds red general's location
-                        red_general = (row, column)
-
-            # iterate over game board locations between two generals to see if all of the intervening spaces are empty
-            if target[1] == red_general[1]:
-                x = abs(target[0] - red_general[0])
-                empty_squares = 0
-                for i in range(1, x):
-                    if self.board()[red_general[0] + i][target[1]] == '  ':
-                        empty_squares += 1
-
-                # if all intervening squares are empty, return False to disallow black from making an illegal move
-                if empty_squares == x - 1:
-                    return False
-
-            # if move is allowed, return True
-            return True
+        return Rules.is_in_check(self._board, COLOR[self.get_turn()] ^ (RED | BLACK)) is False
 
     def check_put_in_check(self):
-        """Checks if the player making the move put the opposing player in check"""
-        # if the red player made the move
-        if self.get_turn() == "red":
-            # get black general's position
-            target = None
-            for row in range(8, 11):
-                for column in range(4, 7):
-                    if self.board()[row][column] != '  ' and self.board()[row][column].get_piece_type() == General:
-                        target = (row, column)
-
-            # iterate over red pieces on the board to see if any can capture black general
-            poss_moves = []
-            for piece in self._red_on_board:
-                row_from = piece.get_location()[0]
-                column_from = piece.get_location()[1]
-
-                for row in range(1, 11):
-                    for column in range(1, 10):
-                        if Piece().checker(self._board, row_from, column_from, row, column) is True:
-                            poss_moves.append((row, column))
-
-            # if any red piece can currently capture black's general, return True
-            if target in poss_moves:
-                return True
-            # otherwise, return False
-            return False
-
-        # if the black player made the move
-        if self.get_turn() == "black":
-            target = None
-            # get red general's position
-            for row in range(1, 4):
-                for column in range(4, 7):
-                    if self.board()[row][column] != '  ' and self.board()[row][column].get_piece_type() == General:
-                        target = (row, column)
-
-            # iterate over black pieces on the board to see if any can capture red general
-            poss_moves = []
-            for piece in self._black_on_board:
-                row_from = piece.get_location()[0]
-                column_from = piece.get_location()[1]
-
-                for row in range(1, 11):
-                    for column in range(1, 10):
-                        if Piece().checker(self._board, row_from, column_from, row, column) is True:
-                            poss_moves.append((row, column))
-
-            # if any black piece can currently capture red's general, return True
-            if target in poss_moves:
-                return True
-            # otherwise, return False
-            return False
+        """
+        Checks if the last move put the player with turn, the opposing player of the one who made it, in check. The
+        check status is kept up to date by every move made, so no attacks need to be evaluated here
+        """
+        return self.is_in_check(self.get_turn())
 
     def check_or_stale(self):
-        """Checks if the player making the move put the opposing player in checkmate or stalemate"""
-
-        # if red made the move
-        if self.get_turn() == "red":
-            # iterate over the black pieces on the board
-            for piece in self._black_on_board:
-                row_from = piece.get_location()[0]
-                column_from = piece.get_location()[1]
-                piece_from = self.board()[row_from][column_from]
-
-                # iterate over all squares of the game board
-                for row in range(1, 11):
-                    for column in range(1, 10):
-                        piece_to = self.board()[row][column]
-
-                        # whenever a move is possible to be made by the black piece, make the move if allowed
-                        # in order to check if a move can be made by a black piece next turn to not be in check
-                        if Piece().checker(self._board, row_from, column_from, row, column) is True:
-
-                            if self.board()[row][column] != '  ':
-
-                                self._red_on_board.remove(self.board()[row][column])
-                                self._red_removed.append(self.board()[row][column])
-
-                            self.board()[row][column] = self.board()[row_from][column_from]
-                            self.board()[row_from][column_from] = '  '
-                            self.board()[row][column].set_location((row, column))
-
-                            # call the check_put_in_check function to check if red still has black in check
-                            # if so, reverse the moves and keep iterating
-                            if self.check_put_in_check() is True:
-
-                                self.board()[row_from][column_from] = piece_from
-                                self.board()[row][column] = piece_to
-
-                                if piece_to != '  ':
-                                    self._red_on_board.append(piece_to)
-                                    self._red_removed.remove(piece_to)
-
-                                self.board()[row_from][column_from].set_location((row_from, column_from))
-
-                            # call the check_in_check function to check if black piece's move would cause the
-                            # flying general situation, and if so, reverse the moves and keep iterating
-                            elif self.check_in_check() is False:
-
-                                self.board()[row_from][column_from] = piece_from
-                                self.board()[row][column] = piece_to
-
-                                if piece_to != '  ':
-                                    self._red_on_board.append(piece_to)
-                                    self._red_removed.remove(piece_to)
-
-                                self.board()[row_from][column_from].set_location((row_from, column_from))
-
-                            # if a move by a black piece causes black to not be in check, reverse the moves, set turn,
-                            # and return False
-                            else:
-                                self.board()[row_from][column_from] = piece_from
-                                self.board()[row][column] = piece_to
-
-                                if piece_to != '  ':
-                                    self._red_on_board.append(piece_to)
-                                    self._red_removed.remove(piece_to)
-
-                                self.board()[row_from][column_from].set_location((row_from, column_from))
+        """
+        Checks if the last move put the player with turn, the opposing player of the one who made it, in checkmate or
+        stalemate. If so, changes the game state accordingly, leaves the turn with the winner and returns True.
+        Otherwise, returns False.
+        """
+        player = COLOR[self.get_turn()]
 
-                                self.set_turn("black")
-                                return False
+        # if the player with turn still has any legal move, return False
+        if Rules.has_legal_move(self._board, player, self.get_game_state(), self.is_in_check(self.get_turn())) is True:
+            return False
 
-            # after iterating through all possible moves by the black pieces, if none of the moves by the black piece
-            # can get black player out of check, change game state accordingly and return True
+        # otherwise, the player who made the last move wins
+        winner = PLAYER[player ^ (RED | BLACK)]
+        if winner == "red":
             self.set_game_state("RED_WON")
-            return True
-
-        # if black made the move
-        if self.get_turn() == "black":
-            # iterate over the red pieces on the board
-            for piece in self._red_on_board:
-                row_from = piece.get_location()[0]
-                column_from = piece.get_location()[1]
-                piece_from = self.board()[row_from][column_from]
-
-                # iterate over all squares of the game board
-                for row in range(1, 11):
-                    for column in range(1, 10):
-                        piece_to = self.board()[row][column]
-
-                        # whenever a move is possible to be made by the red piece, make the move if allowed
-                        # in order to check if a move can be made by a red piece next turn to not be in check
-                        if Piece().checker(self._board, row_from, column_from, row, column) is True:
-
-                            if self.board()[row][column] != '  ':
-                                self._black_on_board.remove(self.board()[row][column])
-                                self._black_removed.append(self.board()[row][column])
-                            self.board()[row][column] = self.board()[row_from][column_from]
-                            self.board()[row_from][column_from] = '  '
-                            self.board()[row][column].set_location((row, column))
-
-                            # call the check_put_in_check function to check if black still has red in check
-                            # if so, reverse the moves and keep iterating
-                            if self.check_put_in_check() is True:
-
-                                self.board()[row_from][column_from] = piece_from
-                                self.board()[row][column] = piece_to
-
-                                if piece_to != '  ':
-                                    self._black_on_board.append(piece_to)
-                                    self._black_removed.remove(piece_to)
-
-                                self.board()[row_from][column_from].set_location((row_from, column_from))
-
-                            # call the check_in_check function to check if red piece's move would cause the
-                            # flying general situation, and if so, reverse the moves and keep iterating
-                            elif self.check_in_check() is False:
-
-                                self.board()[row_from][column_from] = piece_from
-                                self.board()[row][column] = piece_to
-
-                                if piece_to != '  ':
-                                    self._black_on_board.append(piece_to)
-                                    self._black_removed.remove(piece_to)
+        if winner == "black":
+            self.set_game_state("BLACK_WON")
+        self.set_turn(winner)
+        return True
 
-                                self.board()[row_from][column_from].set_location((row_from, column_from))
 
-                            # if a move by a red piece causes red to not be in check, reverse the moves, set turn,
-                            # and return False
-                            else:
+class Rules:
+    """
+    Represents the stateless rules kernel of the game. Every method takes the board, the player bit with the turn and
+    the game state as parameters instead of reading them from a XiangqiGame object. Moves are tried on the board in
+    place and reversed afterwards, so answering whether a move is legal does not allocate anything.
+    """
 
-                                self.board()[row_from][column_from] = piece_from
-                                self.board()[row][column] = piece_to
+    @staticmethod
+    def compute_key(board, player):
+        """
+        Returns the Zobrist key of the given board with the given player having the turn, computed from scratch to
+        verify the key kept up to date by XiangqiGame
+        """
+        key = 0
+        for index in SQUARES:
+            if board[index] != EMPTY:
+                key ^= ZOBRIST[board[index]][index]
+        if player == BLACK:
+            key ^= ZOBRIST_BLACK
+        return key
+
+    @staticmethod
+    def find_general(board, player):
+        """Returns the board index of the given player's general, searching only its castle"""
+        general = GENERAL | player
+        for index in PALACE[player]:
+            if board[index] == general:
+                return index
+        return None
+
+    @staticmethod
+    def generate_moves(board, player):
+        """Yields (from, to) board index pairs of every move the given player's pieces can make by their own rules"""
+        for square_from in SQUARES:
+            piece = board[square_from]
+            if piece & player:
+                for square_to in PIECE_TYPES[piece & TYPE_MASK].generate_moves(board, square_from):
+                    yield square_from, square_to
+
+    @staticmethod
+    def is_square_attacked(board, target, player):
+        """
+        Returns True if a piece belonging to the given player could capture on the given board index. Instead of
+        generating the moves of every piece, looks outward from the index along the chariot and cannon rays, at the
+        horse legs, and at the soldier, adviser and elephant steps around it. The given player's general facing the
+        index on an open column counts as an attack, as per the flying general rule.
+        """
+        # walk each orthogonal ray for chariots, cannons and the general
+        for step in ORTHOGONAL:
+            if Rules.is_ray_attacked(board, target, step, player) is True:
+                return True
 
-                                if piece_to != '  ':
-                                    self._black_on_board.append(piece_to)
-                                    self._black_removed.remove(piece_to)
+        # a horse attacks the index if it stands one horse move away with its leg square empty
+        horse = HORSE | player
+        for index, leg in HORSE_ATTACKERS[target]:
+            if board[index] == horse and board[leg] == EMPTY:
+                return True
 
-                                self.board()[row_from][column_from].set_location((row_from, column_from))
+        # a soldier attacks the square in front of it, and the squares beside it once it has crossed the river
+        soldier = SOLDIER | player
+        for index in SOLDIER_ATTACKERS[player][target]:
+            if board[index] == soldier:
+                return True
 
-                                self.set_turn("red")
-                                return False
+        # elephants and advisers never leave their own side of the river, and advisers never leave the castle
+        if ROW[target] in OWN_SIDE[player]:
+            elephant = ELEPHANT | player
+            for index, eye in ELEPHANT_ATTACKERS[target]:
+                if board[index] == elephant and board[eye] == EMPTY:
+                    return True
+            if target in IN_PALACE[player]:
+                adviser = ADVISER | player
+                for index in ADVISER_MOVES[target]:
+                    if board[index] == adviser:
+                        return True
+        return False
 
-            # after iterating through all possible moves by the red pieces, if none of the moves by the red piece
-            # can get red player out of check, change game state accordingly and return True
-            self.set_game_state("BLACK_WON")
+    @staticmethod
+    def is_ray_attacked(board, target, step, player):
+        """
+        Returns True if a piece belonging to the given player attacks the given board index along the ray leaving it
+        with the given orthogonal step: the first piece on the ray attacks as a chariot or general, and the second piece
+        past that screen attacks as a cannon
+        """
+        index = target + step
+        while board[index] == EMPTY:
+            index += step
+        piece = board[index]
+        if piece == CHARIOT | player:
             return True
+        if piece == GENERAL | player:
+            if step == WIDTH or step == -WIDTH or (index == target + step and target in IN_PALACE[player]):
+                return True
+        if piece != OFFBOARD:
+            index += step
+            while board[index] == EMPTY:
+                index += step
+            if board[index] == CANNON | player:
+                return True
+        return False
 
-
-class Piece:
-    """Represents a Piece with a checker method to check rules concurrent to all of the individual game pieces"""
-    def __init__(self):
-        """Initializes no data members, a Parent class to subclasses"""
-        pass
-
-    def checker(self, board, row_from, column_from, row_to, column_to):
+    @staticmethod
+    def is_line_attacked(board, target, through, player):
         """
-        A checker method to be called by the make move function in the XiangqiGame class to validate moves
-        Takes in the board, row/column from and to for making the move as parameters
+        Returns True if a piece belonging to the given player attacks the given board index along the row or column
+        through the other given index, or as a horse whose leg is the other index. These are the only attacks on a
+        general that a move can open or close through its from and to squares.
         """
-        # if the row/column given for the piece to be moved is outside of the game board bounds, return False
-        if row_from < 1 or row_from > 10:
-            return False
-        if column_from < 1 or column_from > 9:
-            return False
-
-        # if the row/column given for the destination of the piece is outside of the game board bounds, return False
-        if row_to < 1 or row_to > 10:
-            return False
-        if column_to < 1 or column_to > 9:
-            return False
+        step = line_step(target, through)
+        if step != 0:
+            return Rules.is_ray_attacked(board, target, step, player)
+
+        if board[through] == EMPTY:
+            horse = HORSE | player
+            for offset in HORSE_LEG_ATTACKERS.get(through - target, ()):
+                if board[target + offset] == horse:
+                    return True
+        return False
 
-        # if the game has already won, return False
-        if XiangqiGame().get_game_state() != "UNFINISHED":
+    @staticmethod
+    def gives_check(board, square_from, square_to):
+        """
+        Returns True if the move just made on the board from the given board index to the given board index put the
+        opposing general in check, assuming it was not in check before the move. Only looks at the moved piece and at
+        the lines and horse legs through the two indexes, instead of at every piece of the player who made the move.
+        """
+        player = board[square_to] & (RED | BLACK)
+        general = Rules.find_general(board, player ^ (RED | BLACK))
+        if general is None:
             return False
 
-        # if the destination holds a piece that belongs to the player making the move, return False
-        if board[row_to][column_to] != '  ':
-            if board[row_from][column_from].get_player() == board[row_to][column_to].get_player():
-                return False
-
-        # get the type of the piece that is being moved and call its respective is_legal_move function
-        # in order to check if the move is valid per specific piece requirements.
-        if board[row_from][column_from].get_piece_type().is_legal_move(self, board, row_from, column_from, row_to, column_to) is True:
+        if PIECE_TYPES[board[square_to] & TYPE_MASK].is_legal_move(board, square_to, general) is True:
             return True
+        return Rules.is_line_attacked(board, general, square_from, player) is True \
+            or Rules.is_line_attacked(board, general, square_to, player) is True
 
-
-class General(Piece):
-    """Represents a General game piece with type, location and player"""
-    def __init__(self, piece_type, location, player):
-        """Returns a General piece with specified parameters"""
-        super().__init__()
-        self._piece_type = piece_type
-        self._location = location
-        self._player = player
-
-    def __repr__(self):
-        """Sets up repr strings for pieces to be placed on to the game board"""
-        if self._player == "black":
-            return "bG"
-        elif self._player == "red":
-            return "rG"
-
-    def get_piece_type(self):
-        """Returns the piece's type"""
-        return self._piece_type
-
-    def get_location(self):
-        """Returns piece's location on the board"""
-        return self._location
-
-    def set_location(self, location):
-        """Sets the piece's location"""
-        self._location = location
-
-    def get_player(self):
-        """Returns the player the piece belongs to"""
-        return self._player
-
-    def is_legal_move(self, board, row_from, column_from, row_to, column_to):
-        """Takes in board, row/column from and to as parameters to check if the made move is legal for the piece"""
-        # if the general wants to move diagonally, return False
-        if abs(row_from - row_to) == 1 and abs(column_from - column_to) == 1:
+    @staticmethod
+    def is_in_check(board, player):
+        """
+        Returns True if the given player's general can be captured by the opposing player, including the flying general
+        situation where the two generals face each other with no intervening pieces
+        """
+        general = Rules.find_general(board, player)
+        if general is None:
             return False
+        return Rules.is_square_attacked(board, general, player ^ (RED | BLACK))
 
-        # if the general moves more than 1 row, return False
-        if abs(row_from - row_to) != 0 and abs(row_from - row_to) != 1:
+    @staticmethod
+    def is_legal_move(board, player, game_state, square_from, square_to, in_check=True):
+        """
+        Returns True if the given player may move from the given board index to the given board index in the given game
+        state: the move must follow the rules of the piece and must not leave the player's own general exposed. If the
+        player is known not to be in check, passing in_check as False makes the exposure test cheaper
+        """
+        # the piece to be moved must belong to the player with turn
+        if not board[square_from] & player:
             return False
 
-        # if the general moves more than 1 column, return False
-        if abs(column_from - column_to) != 0 and abs(column_from - column_to) != 1:
+        if Piece.checker(board, square_from, square_to, game_state) is not True:
             return False
 
-        # if the general steps outside of the castle, return False
-        if board[row_from][column_from].get_player() == "red":
-            if row_to >= 4 or column_to <= 3 or column_to >= 7:
-                return False
+        return Rules.is_safe_move(board, player, square_from, square_to, in_check)
 
-        if board[row_from][column_from].get_player() == "black":
-            if row_to <= 7 or column_to <= 3 or column_to >= 7:
-                return False
-
-        # otherwise, return True
-        return True
-
-
-class Adviser(Piece):
-    """Represents a Adviser game piece with type, location and player"""
-    def __init__(self, piece_type, location, player):
-        """Returns a Adviser piece with specified parameters"""
-        super().__init__()
-        self._piece_type = piece_type
-        self._location = location
-        self._player = player
-
-    def __repr__(self):
-        """Sets up repr strings for pieces to be placed on to the game board"""
-        if self._player == "black":
-            return "bA"
-        if self._player == "red":
-            return "rA"
-
-    def get_piece_type(self):
-        """Returns the piece's type"""
-        return self._piece_type
-
-    def get_location(self):
-        """Returns piece's location on the board"""
-        return self._location
+    @staticmethod
+    def is_safe_move(board, player, square_from, square_to, in_check=True):
+        """
+        Returns True if making the given move, already known to follow the rules of the piece, does not leave the given
+        player's own general exposed. If the player is known not to be in check and the general is not the piece being
+        moved, only the lines and horse legs through the from and to squares can expose the general
+        """
+        # try the move on the board, check if it exposes the player's general, and reverse the move
+        from_piece = board[square_from]
+        to_piece = board[square_to]
+        board[square_to] = from_piece
+        board[square_from] = EMPTY
+        if in_check or from_piece & TYPE_MASK == GENERAL:
+            exposed = Rules.is_in_check(board, player)
+        else:
+            general = Rules.find_general(board, player)
+            enemy = player ^ (RED | BLACK)
+            exposed = general is not None and (Rules.is_line_attacked(board, general, square_from, enemy) is True
+                                               or Rules.is_line_attacked(board, general, square_to, enemy) is True)
+        board[square_from] = from_piece
+        board[square_to] = to_piece
 
-    def set_location(self, location):
-        """Sets the piece's location"""
-        self._location = location
+        return exposed is False
 
-    def get_player(self):
-        """Returns the player the piece belongs to"""
-        return self._player
-
-    def is_legal_move(self, board, row_from, column_from, row_to, column_to):
-        """Takes in board, row/column from and to as parameters to check if the made move is legal for the piece"""
-        # if the adviser steps outside of the castle, return False
-        if board[row_from][column_from].get_player() == "red":
-            if row_to >= 4 or column_to <= 3 or column_to >= 7:
-                return False
+    @staticmethod
+    def generate_legal_moves(board, player, game_state, in_check=None):
+        """
+        Yields (from, to) board index pairs of every legal move of the given player in the given game state. Whether the
+        player is in check is worked out once if it is not given
+        """
+        if game_state != "UNFINISHED":
+            return
 
-        if board[row_from][column_from].get_player() == "black":
-            if row_to <= 7 or column_to <= 3 or column_to >= 7:
-                return False
+        if in_check is None:
+            in_check = Rules.is_in_check(board, player)
+        for square_from, square_to in list(Rules.generate_moves(board, player)):
+            if Rules.is_safe_move(board, player, square_from, square_to, in_check) is True:
+                yield square_from, square_to
 
-        # if the adviser wants to move orthogonally, return False
-        if not (abs(row_from - row_to) == 1 and abs(column_from - column_to) == 1):
+    @staticmethod
+    def has_legal_move(board, player, game_state, in_check=None):
+        """
+        Returns True if the given player has at least one legal move in the given game state. Whether the player is in
+        check is worked out once if it is not given
+        """
+        if game_state != "UNFINISHED":
             return False
 
-        # otherwise, return True
-        return True
-
-
-class Elephant(Piece):
-    """Represents a Elephant game piece with type, location and player"""
-    def __init__(self, piece_type, location, player):
-        """Returns a Elephant piece with specified parameters"""
-        super().__init__()
-        self._piece_type = piece_type
-        self._location = location
-        self._player = player
-
-    def __repr__(self):
-        """Sets up repr strings for pieces to be placed on to the game board"""
-        if self._player == "black":
-            return "bE"
-        if self._player == "red":
-            return "rE"
-
-    def get_piece_type(self):
-        """Returns the piece's type"""
-        return self._piece_type
-
-    def get_location(self):
-        """Returns piece's location on the board"""
-        return self._location
-
-    def set_location(self, location):
-        """Sets the piece's location"""
-        self._location = location
-
-    def get_player(self):
-        """Returns the player the piece belongs to"""
-        return self._player
-
-    def is_legal_move(self, board, row_from, column_from, row_to, column_to):
-        """Takes in board, row/column from and to as parameters to check if the made move is legal for the piece"""
-        # if the elephant piece wants to cross the river, return False
-        if board[row_from][column_from].get_player() == 'red':
-            if row_to > 5:
-                return False
+        if in_check is None:
+            in_check = Rules.is_in_check(board, player)
+        for square_from, square_to in Rules.generate_moves(board, player):
+            if Rules.is_safe_move(board, player, square_from, square_to, in_check) is True:
+                return True
+        return False
 
-        if board[row_from][column_from].get_player() == 'black':
-            if row_to < 6:
-                return False
-
-        # Elephant piece is confined to 7 positions while moving two points diagonally without jumping over pieces
-        if row_from == 1 and column_from == 3:
-            if row_to != 3:
-                return False
-            if column_to != 1 and column_to != 5:
-                return False
-            if column_to == 1:
-                if board[2][2] != '  ':
-                    return False
-            if column_to == 5:
-                if board[2][4] != '  ':
-                    return False
-
-        if row_from == 1 and column_from == 7:
-            if row_to != 3:
-                return False
-            if column_to != 5 and column_to != 9:
-                return False
-            if column_to == 5:
-                if board[2][6] != '  ':
-                    return False
-            if column_to == 9:
-                if board[2][8] != '  ':
-                    return False
-
-        if row_from == 3 and column_from == 1:
-            if row_to != 1 and row_to != 5:
-                return False
-            if column_to != 3:
-                return False
-            if row_to == 1:
-                if board[2][2] != '  ':
-                    return False
-            if row_to == 5:
-                if board[4][2] != '  ':
-                    return False
-
-        if row_from == 3 and column_from == 5:
-            if row_to != 1 and row_to != 5:
-                return False
-            if column_to != 3 and column_to != 7:
-                return False
-            if row_to == 1 and column_to == 3:
-                if board[2][4] != '  ':
-                    return False
-            if row_to == 1 and column_to == 7:
-                if board[2][6] != '  ':
-                    return False
-            if row_to == 5 and column_to == 3:
-                if board[4][4] != '  ':
-                    return False
-            if row_to == 5 and column_to == 7:
-                if board[4][6] != '  ':
-                    return False
-
-        if row_from == 3 and column_from == 9:
-            if row_to != 1 and row_to != 5:
-                return False
-            if column_to != 7:
-                return False
-            if row_to == 1:
-                if board[2][8] != '  ':
-                    return False
-            if row_to == 5:
-                if board[4][8] != '  ':
-                    return False
-
-        if row_from == 5 and column_from == 3:
-            if row_to != 3:
-                return False
-            if column_to != 1 and column_to != 5:
-                return False
-            if column_to == 1:
-                if board[4][2] != '  ':
-                    return False
-            if column_to == 5:
-                if board[4][4] != '  ':
-                    return False
-
-        if row_from == 5 and column_from == 7:
-            if row_to != 3:
-                return False
-            if column_to != 5 and column_to != 9:
-                return False
-            if column_to == 5:
-                if board[4][6] != '  ':
-                    return False
-            if column_to == 9:
-                if board[4][8] != '  ':
-                    return False
-
-        if row_from == 6 and column_from == 3:
-            if row_to != 8:
-                return False
-            if column_to != 1 and column_to != 5:
-                return False
-            if column_to == 1:
-                if board[7][2] != '  ':
-                    return False
-            if column_to == 5:
-                if board[7][4] != '  ':
-                    return False
-
-        if row_from == 6 and column_from == 7:
-            if row_to != 8:
-                return False
-            if column_to != 5 and column_to != 9:
-                return False
-            if column_to == 5:
-                if board[7][6] != '  ':
-                    return False
-            if column_to == 9:
-                if board[7][8] != '  ':
-                    return False
-
-        if row_from == 8 and column_from == 1:
-            if row_to != 6 and row_to != 10:
-                return False
-            if column_to != 3:
-                return False
-            if row_to == 6:
-                if board[7][2] != '  ':
-                    return False
-            if row_to == 10:
-                if board[9][2] != '  ':
-                    return False
-
-        if row_from == 8 and column_from == 5:
-            if row_to != 6 and row_to != 10:
-                return False
-            if column_to != 3 and column_to != 7:
-                return False
-            if row_to == 6 and column_to == 3:
-                if board[7][4] != '  ':
-                    return False
-            if row_to == 6 and column_to == 7:
-                if board[7][6] != '  ':
-                    return False
-            if row_to == 10 and column_to == 3:
-                if board[9][4] != '  ':
-                    return False
-            if row_to == 10 and column_to == 7:
-                if board[9][6] != '  ':
-                    return False
-
-        if row_from == 8 and column_from == 9:
-            if row_to != 6 and row_to != 10:
-                return False
-            if column_to != 7:
-                return False
-            if row_to == 6:
-                if board[7][8] != '  ':
-                    return False
-            if row_to == 10:
-                if board[9][8] != '  ':
-                    return False
-
-        if row_from == 10 and column_from == 3:
-            if row_to != 8:
-                return False
-            if column_to != 1 and column_to != 5:
-                return False
-            if column_to == 1:
-                if board[9][2] != '  ':
-                    return False
-            if column_to == 5:
-                if board[9][4] != '  ':
-                    return False
-
-        if row_from == 10 and column_from == 7:
-            if row_to != 8:
-                return False
-            if column_to != 5 and column_to != 9:
-                return False
-            if column_to == 5:
-                if board[9][6] != '  ':
-                    return False
-            if column_to == 9:
-                if board[9][8] != '  ':
-                    return False
-
-        # if a move is allowed, return True
-        return True
 
+class Piece:
+    """
+    Represents a Piece with data members for its type, location and player and its slot index in its player's list of
+    pieces on the board, and a checker method to check rules concurrent to all of the individual game pieces. Pieces
+    keep their data members in slots instead of a dictionary, since every live game holds 32 of them
+    """
+    __slots__ = ("_piece_type", "_location", "_player", "_index")
 
-class Horse(Piece):
-    """Represents a Horse game piece with type, location and player"""
     def __init__(self, piece_type, location, player):
-        """Returns a Horse piece with specified parameters"""
-        super().__init__()
+        """Returns a piece of the given type, location and player, a Parent class"""
         self._piece_type = piece_type
         self._location = location
         self._player = player
+        self._index = None
 
     def __repr__(self):
         """Sets up repr strings for pieces to be placed on to the game board"""
-        if self._player == "black":
-            return "bH"
-        if self._player == "red":
-            return "rH"
+        return self._player[0] + self.letter
+
+    def get_code(self):
+        """Returns the code of the piece as stored on the game board"""
+        return self._piece_type.code | COLOR[self._player]
 
     def get_piece_type(self):
         """Returns the piece's type"""
@@ -1000,350 +1064,249 @@ class Horse(Piece):
         """Returns the player the piece belongs to"""
         return self._player
 
-    def is_legal_move(self, board, row_from, column_from, row_to, column_to):
-        """Takes in board, row/column from and to as parameters to check if the made move is legal for the piece"""
-        # if the horse pieces moves beyond two spaces row or column-wise, return False
-        if row_to >= row_from + 3:
-            return False
-        if row_to <= row_from - 3:
-            return False
-        if column_to >= column_from + 3:
+    @staticmethod
+    def checker(board, square_from, square_to, game_state="UNFINISHED"):
+        """
+        A checker method to be called by the rules kernel to validate moves. Takes in the board, squares from and to
+        for making the move, and the game state as parameters
+        """
+        # if there is no piece to be moved, or the destination is outside of the game board bounds, return False
+        from_piece = board[square_from]
+        if not from_piece & (RED | BLACK):
             return False
-        if column_to <= column_from - 3:
+        if board[square_to] == OFFBOARD:
             return False
 
-        # if the horse piece moves diagonally two spaces, return False
-        if row_to == row_from + 2 and column_to == column_from + 2:
-            return False
-        if row_to == row_from + 2 and column_to == column_from - 2:
-            return False
-        if row_to == row_from - 2 and column_to == column_from + 2:
+        # if the game has already won, return False
+        if game_state != "UNFINISHED":
             return False
-        if row_to == row_from - 2 and column_to == column_from - 2:
+
+        # if the destination holds a piece that belongs to the player making the move, return False
+        if board[square_to] & from_piece & (RED | BLACK):
             return False
 
-        # if the horse piece moves to upper row, if there is an intervening piece immediately above or the piece moves
-        # to the same column, return False
-        if row_to == row_from - 2:
-            if board[row_from - 1][column_from] != '  ':
-                return False
-            if column_from == column_to:
-                return False
+        # get the type of the piece that is being moved and call its respective is_legal_move function
+        # in order to check if the move is valid per specific piece requirements.
+        if PIECE_TYPES[from_piece & TYPE_MASK].is_legal_move(board, square_from, square_to) is True:
+            return True
 
-        # if the horse piece moves to lower row, if there is an intervening piece immediately below or the piece moves
-        # to the same column, return False
-        if row_to == row_from + 2:
-            if board[row_from + 1][column_from] != '  ':
-                return False
-            if column_from == column_to:
-                return False
 
-        # if the horse piece moves to lower column, if there is an intervening piece immediately left or the piece moves
-        # to the same row, return False
-        if column_to == column_from - 2:
-            if board[row_from][column_from - 1] != '  ':
-                return False
-            if row_from == row_to:
-                return False
+class General(Piece):
+    """Represents a General game piece with type, location and player"""
+    code = GENERAL
+    letter = "G"
+    __slots__ = ()
 
-        # if horse piece moves to upper column, if there is an intervening piece immediately right or the piece moves
-        # to the same row, return False
-        if column_to == column_from + 2:
-            if board[row_from][column_from + 1] != '  ':
-                return False
-            if row_from == row_to:
-                return False
+    @staticmethod
+    def is_legal_move(board, square_from, square_to):
+        """Takes in board, squares from and to as parameters to check if the made move is legal for the piece"""
+        # the general moves one step orthogonally without leaving the castle
+        return square_to in GENERAL_MOVES[square_from]
 
-        # if the horse piece moves one space diagonally, return False
-        if row_to == row_from + 1 and column_to == column_from + 1:
-            return False
-        if row_to == row_from + 1 and column_to == column_from - 1:
-            return False
-        if row_to == row_from - 1 and column_to == column_from + 1:
-            return False
-        if row_to == row_from - 1 and column_to == column_from - 1:
-            return False
+    @staticmethod
+    def generate_moves(board, square_from):
+        """Yields the board indexes the general can move to: one orthogonal step without leaving the castle"""
+        player = board[square_from] & (RED | BLACK)
+        for square_to in GENERAL_MOVES[square_from]:
+            if not board[square_to] & player:
+                yield square_to
 
-        # if the horse piece moves one space orthogonally, return False
-        if row_to == row_from + 1 and column_to == column_from:
-            return False
-        if row_to == row_from - 1 and column_to == column_from:
-            return False
-        if row_to == row_from and column_to == column_from - 1:
-            return False
-        if row_to == row_from and column_to == column_from + 1:
-            return False
 
-        # otherwise, return True
-        return True
+class Adviser(Piece):
+    """Represents a Adviser game piece with type, location and player"""
+    code = ADVISER
+    letter = "A"
+    __slots__ = ()
 
+    @staticmethod
+    def is_legal_move(board, square_from, square_to):
+        """Takes in board, squares from and to as parameters to check if the made move is legal for the piece"""
+        # the adviser moves one step diagonally without leaving the castle
+        return square_to in ADVISER_MOVES[square_from]
 
-class Chariot(Piece):
-    """Represents a Chariot game piece with type, location and player"""
-    def __init__(self, piece_type, location, player):
-        """Returns a Chariot piece with specified parameters"""
-        super().__init__()
-        self._piece_type = piece_type
-        self._location = location
-        self._player = player
+    @staticmethod
+    def generate_moves(board, square_from):
+        """Yields the board indexes the adviser can move to: one diagonal step without leaving the castle"""
+        player = board[square_from] & (RED | BLACK)
+        for square_to in ADVISER_MOVES[square_from]:
+            if not board[square_to] & player:
+                yield square_to
 
-    def __repr__(self):
-        """Sets up repr strings for pieces to be placed on to the game board"""
-        if self._player == "black":
-            return "bC"
-        if self._player == "red":
-            return "rC"
 
-    def get_piece_type(self):
-        """Returns the piece's type"""
-        return self._piece_type
+class Elephant(Piece):
+    """Represents a Elephant game piece with type, location and player"""
+    code = ELEPHANT
+    letter = "E"
+    __slots__ = ()
+
+    @staticmethod
+    def is_legal_move(board, square_from, square_to):
+        """Takes in board, squares from and to as parameters to check if the made move is legal for the piece"""
+        # the elephant moves two steps diagonally without crossing the river, if the eye square between is empty
+        eye = ELEPHANT_MOVES[square_from].get(square_to)
+        return eye is not None and board[eye] == EMPTY
+
+    @staticmethod
+    def generate_moves(board, square_from):
+        """Yields the board indexes the elephant can move to: two diagonal steps over an empty eye, on its own side"""
+        player = board[square_from] & (RED | BLACK)
+        for square_to, eye in ELEPHANT_MOVES[square_from].items():
+            if board[eye] == EMPTY and not board[square_to] & player:
+                yield square_to
 
-    def get_location(self):
-        """Returns piece's location on the board"""
-        return self._location
 
-    def set_location(self, location):
-        """Sets the piece's location"""
-        self._location = location
+class Horse(Piece):
+    """Represents a Horse game piece with type, location and player"""
+    code = HORSE
+    letter = "H"
+    __slots__ = ()
+
+    @staticmethod
+    def is_legal_move(board, square_from, square_to):
+        """Takes in board, squares from and to as parameters to check if the made move is legal for the piece"""
+        # the horse moves one step orthogonally and one step diagonally, if the leg square of the first step is empty
+        leg = HORSE_MOVES[square_from].get(square_to)
+        return leg is not None and board[leg] == EMPTY
+
+    @staticmethod
+    def generate_moves(board, square_from):
+        """Yields the board indexes the horse can move to: one orthogonal and one diagonal step over an empty leg"""
+        player = board[square_from] & (RED | BLACK)
+        for square_to, leg in HORSE_MOVES[square_from].items():
+            if board[leg] == EMPTY and not board[square_to] & player:
+                yield square_to
 
-    def get_player(self):
-        """Returns the player the piece belongs to"""
-        return self._player
 
-    def is_legal_move(self, board, row_from, column_from, row_to, column_to):
-        """Takes in board, row/column from and to as parameters to check if the made move is legal for the piece"""
-        # if the chariot moves diagonally, return False
-        if row_from != row_to and column_from != column_to:
+class Chariot(Piece):
+    """Represents a Chariot game piece with type, location and player"""
+    code = CHARIOT
+    letter = "C"
+    __slots__ = ()
+
+    @staticmethod
+    def is_legal_move(board, square_from, square_to):
+        """Takes in board, squares from and to as parameters to check if the made move is legal for the piece"""
+        # if the chariot does not move along a row or column, return False
+        step = line_step(square_from, square_to)
+        if step == 0:
             return False
 
-        # when moving horizontally, if there is an intervening piece between from and to locations, return False
-        if row_from == row_to:
-            if column_from > column_to:
-                x = abs(column_to - column_from)
-                for i in range(1, x):
-                    if board[row_from][column_from - i] != '  ':
-                        return False
-
-            if column_from < column_to:
-                x = abs(column_to - column_from)
-                for i in range(1, x):
-                    if board[row_from][column_from + i] != '  ':
-                        return False
-
-        # when moving vertically, if there is an intervening piece between from and to locations, return False
-        if column_from == column_to:
-            if row_from > row_to:
-                x = abs(row_to - row_from)
-                for i in range(1, x):
-                    if board[row_from - i][column_from] != '  ':
-                        return False
-
-            if row_from < row_to:
-                x = abs(row_to - row_from)
-                for i in range(1, x):
-                    if board[row_from + i][column_from] != '  ':
-                        return False
+        # if there is an intervening piece between from and to locations, return False
+        index = square_from + step
+        while index != square_to:
+            if board[index] != EMPTY:
+                return False
+            index += step
 
         # otherwise, return True
         return True
 
+    @staticmethod
+    def generate_moves(board, square_from):
+        """Yields the board indexes the chariot can move to: any distance orthogonally without jumping over pieces"""
+        player = board[square_from] & (RED | BLACK)
+        for step in ORTHOGONAL:
+            square_to = square_from + step
+            while board[square_to] == EMPTY:
+                yield square_to
+                square_to += step
+            if not board[square_to] & (player | OFFBOARD):
+                yield square_to
+
 
 class Cannon(Piece):
     """Represents a Cannon game piece with type, location and player"""
-    def __init__(self, piece_type, location, player):
-        """Returns a Cannon piece with specified parameters"""
-        super().__init__()
-        self._piece_type = piece_type
-        self._location = location
-        self._player = player
-
-    def __repr__(self):
-        """Sets up repr strings for pieces to be placed on to the game board"""
-        if self._player == "black":
-            return "bN"
-        if self._player == "red":
-            return "rN"
-
-    def get_piece_type(self):
-        """Returns the piece's type"""
-        return self._piece_type
-
-    def get_location(self):
-        """Returns piece's location on the board"""
-        return self._location
-
-    def set_location(self, location):
-        """Sets the piece's location"""
-        self._location = location
-
-    def get_player(self):
-        """Returns the player the piece belongs to"""
-        return self._player
-
-    def is_legal_move(self, board, row_from, column_from, row_to, column_to):
-        """Takes in board, row/column from and to as parameters to check if the made move is legal for the piece"""
-
-        # if the move is not capturing any opposing piece
-        if board[row_to][column_to] == '  ':
-
-            # if the cannon piece is moving diagonally, return False
-            if row_from != row_to and column_from != column_to:
-                return False
-
-            # when moving horizontally, if there is an intervening piece between from and to locations, return False
-            if row_from == row_to:
-                if column_from > column_to:
-                    x = abs(column_to - column_from)
-                    for i in range(1, x):
-                        if board[row_from][column_from - i] != '  ':
-                            return False
-
-                if column_from < column_to:
-                    x = abs(column_to - column_from)
-                    for i in range(1, x):
-                        if board[row_from][column_from + i] != '  ':
-                            return False
-
-            # when moving vertically, if there is an intervening piece between from and to locations, return False
-            if column_from == column_to:
-                if row_from > row_to:
-                    x = abs(row_to - row_from)
-                    for i in range(1, x):
-                        if board[row_from - i][column_from] != '  ':
-                            return False
-
-                if row_from < row_to:
-                    x = abs(row_to - row_from)
-                    for i in range(1, x):
-                        if board[row_from + i][column_from] != '  ':
-                            return False
-
-        # if the move is capturing an opposing piece
-        else:
-            # if the cannon piece is moving diagonally, return False
-            if row_from != row_to and column_from != column_to:
-                return False
-
-            # when moving horizontally, if the cannon is not jumping over exactly one friend or foe, return False
-            friend_or_foe = 0
-            if row_from == row_to:
-                if column_from > column_to:
-                    x = abs(column_to - column_from)
-                    for i in range(1, x):
-                        if board[row_from][column_from - i] != '  ':
-                            friend_or_foe += 1
-                    if friend_or_foe != 1:
-                        return False
-
-                if column_from < column_to:
-                    x = abs(column_to - column_from)
-                    for i in range(1, x):
-                        if board[row_from][column_from + i] != '  ':
-                            friend_or_foe += 1
-                    if friend_or_foe != 1:
-                        return False
-
-            # moving vertically, if the cannon is not jumping over exactly one friend or foe, return False
-            if column_from == column_to:
-                if row_from > row_to:
-                    x = abs(row_to - row_from)
-                    for i in range(1, x):
-                        if board[row_from - i][column_from] != '  ':
-                            friend_or_foe += 1
-                    if friend_or_foe != 1:
-                        return False
-
-                if row_from < row_to:
-                    x = abs(row_to - row_from)
-                    for i in range(1, x):
-                        if board[row_from + i][column_from] != '  ':
-                            friend_or_foe += 1
-                    if friend_or_foe != 1:
-                        return False
+    code = CANNON
+    letter = "N"
+    __slots__ = ()
+
+    @staticmethod
+    def is_legal_move(board, square_from, square_to):
+        """Takes in board, squares from and to as parameters to check if the made move is legal for the piece"""
+        # if the cannon does not move along a row or column, return False
+        step = line_step(square_from, square_to)
+        if step == 0:
+            return False
 
-        # otherwise, return True
-        return True
+        # count the intervening pieces between from and to locations
+        friend_or_foe = 0
+        index = square_from + step
+        while index != square_to:
+            if board[index] != EMPTY:
+                friend_or_foe += 1
+            index += step
+
+        # a move that is not capturing must not jump over any piece, and a capture must jump over exactly one friend
+        # or foe
+        if board[square_to] == EMPTY:
+            return friend_or_foe == 0
+        return friend_or_foe == 1
+
+    @staticmethod
+    def generate_moves(board, square_from):
+        """
+        Yields the board indexes the cannon can move to: any distance orthogonally without jumping over pieces, or a
+        capture by jumping over exactly one friend or foe
+        """
+        enemy = board[square_from] & (RED | BLACK) ^ (RED | BLACK)
+        for step in ORTHOGONAL:
+            square_to = square_from + step
+            while board[square_to] == EMPTY:
+                yield square_to
+                square_to += step
+
+            # if there is a screen, look past it for the first piece
+            if board[square_to] != OFFBOARD:
+                square_to += step
+                while board[square_to] == EMPTY:
+                    square_to += step
+                if board[square_to] & enemy:
+                    yield square_to
 
 
 class Solider(Piece):
     """Represents a Soldier game piece with type, location and player"""
-    def __init__(self, piece_type, location, player):
-        """Returns a Soldier piece with specified parameters"""
-        super().__init__()
-        self._piece_type = piece_type
-        self._location = location
-        self._player = player
-
-    def __repr__(self):
-        """Sets up repr strings for pieces to be placed on to the game board"""
-        if self._player == "black":
-            return "bS"
-        if self._player == "red":
-            return "rS"
-
-    def get_piece_type(self):
-        """Returns the piece's type"""
-        return self._piece_type
-
-    def get_location(self):
-        """Returns piece's location on the board"""
-        return self._location
-
-    def set_location(self, location):
-        """Sets the piece's location"""
-        self._location = location
-
-    def get_player(self):
-        """Returns the player the piece belongs to"""
-        return self._player
-
-    def is_legal_move(self, board, row_from, column_from, row_to, column_to):
-        """Takes in board, row/column from and to as parameters to check if the made move is legal for the piece"""
-        # if soldier moves diagonally, return False
-        if row_from != row_to and column_from != column_to:
-            return False
-
-        # if the piece to be moved belongs to red player
-        if board[row_from][column_from].get_player() == 'red':
-            # if the piece moves sideways before crossing the river, return False
-            if row_from == 4 or row_from == 5:
-                if column_from != column_to:
-                    return False
-                # if the piece does not move exactly one position forward, return False
-                if row_to != row_from + 1:
-                    return False
-
-            # if the piece already crossed the river
-            if row_from >= 6:
-                # if the piece does not move rows the piece must move one position sideways, if not, return False
-                if row_from == row_to:
-                    if column_to != column_from - 1 and column_to != column_from + 1:
-                        return False
-                # if the piece does not move columns the piece must move one position forward, if not, return False
-                if column_from == column_to:
-                    if row_to != row_from + 1:
-                        return False
-
-        # if the piece to be moved belongs to black player
-        if board[row_from][column_from].get_player() == 'black':
-            # if the piece moves sideways before crossing the river, return False
-            if row_from == 6 or row_from == 7:
-                if column_from != column_to:
-                    return False
-                # if the piece does not move exactly one position forward, return False
-                if row_to != row_from - 1:
-                    return False
-
-            # if the piece already crossed the river
-            if row_from <= 5:
-                # if the piece does not move rows the piece must move one position sideways, if not, return False
-                if row_from == row_to:
-                    if column_to != column_from - 1 and column_to != column_from + 1:
-                        return False
-                # if the piece does not move columns the piece must move one position forward, if not, return False
-                if column_from == column_to:
-                    if row_to != row_from - 1:
-                        return False
-        # otherwise, return True
-        return True
-
+    code = SOLDIER
+    letter = "S"
+    __slots__ = ()
+
+    @staticmethod
+    def is_legal_move(board, square_from, square_to):
+        """Takes in board, squares from and to as parameters to check if the made move is legal for the piece"""
+        # the soldier moves one step forward, or also one step sideways once it has crossed the river
+        return square_to in SOLDIER_MOVES[board[square_from] & (RED | BLACK)][square_from]
+
+    @staticmethod
+    def generate_moves(board, square_from):
+        """Yields the board indexes the soldier can move to: one step forward, or also sideways across the river"""
+        player = board[square_from] & (RED | BLACK)
+        for square_to in SOLDIER_MOVES[player][square_from]:
+            if not board[square_to] & player:
+                yield square_to
+
+
+# piece classes indexed by the type bits of their code
+PIECE_TYPES = (None, General, Adviser, Elephant, Horse, Chariot, Cannon, Solider)
+
+# strings for the codes on the game board as printed by get_board
+NAMES = {EMPTY: '  '}
+NAMES.update({RED | piece_type.code: "r" + piece_type.letter for piece_type in PIECE_TYPES[1:]})
+NAMES.update({BLACK | piece_type.code: "b" + piece_type.letter for piece_type in PIECE_TYPES[1:]})
+
+# letters of the codes in Xiangqi FEN, upper case for red and lower case for black, with the alternative letters for
+# elephants and horses also read, and the turn letters of FEN
+FEN_LETTERS = {}
+for _piece_type, _letter in zip(PIECE_TYPES[1:], "KABNRCP"):
+    FEN_LETTERS[RED | _piece_type.code] = _letter
+    FEN_LETTERS[BLACK | _piece_type.code] = _letter.lower()
+FEN_CODES = {letter: code for code, letter in FEN_LETTERS.items()}
+FEN_CODES.update({"E": RED | ELEPHANT, "e": BLACK | ELEPHANT, "H": RED | HORSE, "h": BLACK | HORSE})
+FEN_TURNS = {"w": "red", "r": "red", "b": "black"}
+del _piece_type, _letter
+
+# starting positions of the red pieces, in the order they are kept on the board lists; black mirrors the rows
+INITIAL_LAYOUT = (
+    (Chariot, 1, 1), (Horse, 1, 2), (Elephant, 1, 3), (Adviser, 1, 4), (General, 1, 5), (Adviser, 1, 6),
+    (Elephant, 1, 7), (Horse, 1, 8), (Chariot, 1, 9), (Cannon, 3, 2), (Cannon, 3, 8),
+    (Solider, 4, 1), (Solider, 4, 3), (Solider, 4, 5), (Solider, 4, 7), (Solider, 4, 9),
+)